@@ -0,0 +1,77 @@
+"""
+Compara os backends de busca (índice em memória, ILIKE antigo e, em MySQL, FULLTEXT).
+
+Uso (a partir da pasta api/):
+    python -m benchmarks.bench_search --rows 100000
+    DATABASE_URL=mysql+pymysql://... python -m benchmarks.bench_search --rows 0   # usa os dados existentes
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select
+
+from benchmarks import seed
+
+QUERIES = ["zebra", "zeb", "honeywell 1900", "voyager", "datalogic quick", "zebar", "leitor optico", "gd4500", "bluetoth"]
+
+
+async def run_backend(database, backend, repeat: int):
+    from models.scanner import Scanner
+
+    async with database.AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        await backend.warm(db)
+        warm_ms = (time.perf_counter() - started) * 1000
+
+        results = {}
+        for term in QUERIES:
+            timings = []
+            hits = 0
+            for _ in range(repeat):
+                started = time.perf_counter()
+                match = await backend.match(db, term)
+                query = select(Scanner.id).filter(match.clause)
+                order = match.relevance.desc() if match.relevance is not None else Scanner.id.desc()
+                hits = len((await db.execute(query.order_by(order).limit(10))).all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[term] = {
+                "hits": hits,
+                "mean_ms": round(statistics.mean(timings), 3),
+                "max_ms": round(max(timings), 3),
+            }
+        return {"warm_ms": round(warm_ms, 1), "queries": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="linhas a gerar (0 = usar as que já existem)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db", default=None, help="URL do banco (padrão: DATABASE_URL ou sqlite:///bench.db)")
+    args = parser.parse_args()
+
+    database = seed.setup_database(args.db)
+    if args.rows:
+        seed.seed_scanners(database, args.rows)
+
+    asyncio.run(run_all(database, args.repeat))
+
+
+async def run_all(database, repeat: int):
+    import services.search as search_service
+
+    names = ["memory", "like"]
+    if database.engine.dialect.name == "mysql":
+        names.append("fulltext")
+
+    for name in names:
+        report = await run_backend(database, search_service.create_backend(name), repeat)
+        print(f"\n== {name} (montagem: {report['warm_ms']} ms)")
+        for term, result in report["queries"].items():
+            print(f"  {term:<18} {result['hits']:>3} resultados  média {result['mean_ms']:>8} ms  máx {result['max_ms']:>8} ms")
+    await database.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Compara a serialização da listagem: objetos do ORM + jsonable_encoder (caminho antigo)
+contra tuplas de colunas + conversor pré-montado + orjson (caminho atual), com 10, 100 e 1000 linhas.
+Também mede a leitura no banco (hidratar Scanner vs. selecionar só as colunas do card).
+
+Uso (a partir da pasta api/):
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --sizes 10,100,1000 --repeat 200
+"""
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks import seed
+
+DEFAULT_SIZES = "10,100,1000"
+
+
+def timed(fn, repeat: int) -> float:
+    """Mediana em microssegundos de repeat execuções"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.median(timings)
+
+
+def encoding_report(database, sizes, repeat: int):
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from sqlalchemy import select
+    from models.scanner import Scanner
+    from services import serialization
+
+    fields = serialization.CARD_FIELDS
+    columns = serialization.columns(fields)
+    encode = serialization.row_encoder(fields)
+
+    with database.SessionLocal() as db:
+        orm_rows = db.scalars(select(Scanner).order_by(Scanner.id).limit(max(sizes))).all()
+        tuple_rows = db.execute(select(*columns).order_by(Scanner.id).limit(max(sizes))).all()
+
+    def page(scanners):
+        return {"total": len(scanners), "total_pages": 1, "page": 1, "next_cursor": None, "scanners": scanners}
+
+    results = []
+    for size in sizes:
+        orm_page, tuple_page = orm_rows[:size], tuple_rows[:size]
+
+        def old_path():
+            return JSONResponse(content=jsonable_encoder(page(orm_page))).body
+
+        def new_path():
+            return serialization.FastJSONResponse(serialization.dumps(page([encode(row) for row in tuple_page]))).body
+
+        def new_path_stdlib_json():
+            rows = [encode(row) for row in tuple_page]
+            return json.dumps(page(rows), default=serialization._default, separators=(",", ":")).encode()
+
+        results.append({
+            "rows": size,
+            "orm_jsonable_encoder_us": round(timed(old_path, repeat), 1),
+            "tuples_stdlib_json_us": round(timed(new_path_stdlib_json, repeat), 1),
+            "tuples_orjson_us": round(timed(new_path, repeat), 1) if serialization.orjson else None,
+            "bytes": len(new_path()),
+        })
+    return results
+
+
+def fetch_report(database, sizes, repeat: int):
+    from sqlalchemy import select
+    from models.scanner import Scanner
+    from services import serialization
+
+    columns = serialization.columns(serialization.CARD_FIELDS)
+    results = []
+    with database.SessionLocal() as db:
+        for size in sizes:
+            def orm_fetch():
+                db.expunge_all()  # Sem isso o identity map reaproveita os objetos já carregados
+                return db.scalars(select(Scanner).order_by(Scanner.id).limit(size)).all()
+
+            def tuple_fetch():
+                return db.execute(select(*columns).order_by(Scanner.id).limit(size)).all()
+
+            results.append({
+                "rows": size,
+                "orm_hydration_us": round(timed(orm_fetch, repeat), 1),
+                "column_tuples_us": round(timed(tuple_fetch, repeat), 1),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="tamanhos de página separados por vírgula")
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--db", default=None, help="URL do banco (padrão: DATABASE_URL ou sqlite:///bench.db)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    database = seed.setup_database(args.db)
+    seed.seed_scanners(database, max(sizes))
+
+    from services import serialization
+    print(f"orjson: {'sim' if serialization.orjson else 'não instalado'}")
+
+    print("\n== Codificação (µs, mediana)")
+    print(f"  {'linhas':>6} {'ORM+jsonable':>14} {'tuplas+json':>12} {'tuplas+orjson':>14} {'bytes':>9}")
+    for row in encoding_report(database, sizes, args.repeat):
+        orjson_us = row["tuples_orjson_us"] if row["tuples_orjson_us"] is not None else "-"
+        print(f"  {row['rows']:>6} {row['orm_jsonable_encoder_us']:>14} {row['tuples_stdlib_json_us']:>12} {orjson_us:>14} {row['bytes']:>9}")
+
+    print("\n== Leitura no banco (µs, mediana)")
+    print(f"  {'linhas':>6} {'ORM':>10} {'colunas':>10}")
+    for row in fetch_report(database, sizes, args.repeat):
+        print(f"  {row['rows']:>6} {row['orm_hydration_us']:>10} {row['column_tuples_us']:>10}")
+
+
+if __name__ == "__main__":
+    main()
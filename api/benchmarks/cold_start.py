@@ -0,0 +1,118 @@
+"""
+Mede o cold start da API: cada rodada é um processo Python novo que importa main,
+roda o startup e faz a primeira requisição (em processo, via httpx + ASGITransport).
+Reporta import, startup, primeira resposta e o total, e com --profile mostra os módulos
+que mais pesam no import (python -X importtime).
+
+Uso (a partir da pasta api/, com pip install -r benchmarks/requirements.txt):
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --env WARM_ON_STARTUP=false --path "/api/scanners?limit=12"
+    python -m benchmarks.cold_start --profile 25
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks import seed
+
+# Código executado em cada processo novo; imprime os tempos em JSON na última linha
+CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+import httpx
+
+async def first_request(path):
+    await main.app.router.startup()
+    ready = time.perf_counter()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://cold") as client:
+        response = await client.get(path)
+    done = time.perf_counter()
+    await main.app.router.shutdown()
+    return ready, done, response.status_code
+
+ready, done, status = asyncio.run(first_request(sys.argv[1]))
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_response_ms": (done - ready) * 1000,
+    "total_ms": (done - started) * 1000,
+    "status": status,
+}))
+"""
+
+
+def run_once(path: str, env: dict, importtime: bool = False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", CHILD, path]
+    result = subprocess.run(command, env=env, capture_output=True, text=True, cwd=os.getcwd())
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def import_profile(stderr: str, top: int):
+    """Módulos com maior tempo acumulado de import (linhas 'import time: self | cumulative | nome')"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if cumulative.isdigit():
+            rows.append((int(cumulative) / 1000, name))
+    # Só os pacotes de primeiro nível (e os módulos do projeto), para não repetir a árvore inteira
+    top_level = [(ms, name) for ms, name in rows if "." not in name or name.split(".")[0] in ("routers", "services", "models")]
+    return sorted(top_level, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/api/scanners?limit=12", help="primeira requisição feita em cada processo")
+    parser.add_argument("--rows", type=int, default=1000, help="scanners no SQLite do benchmark (0 = não popular)")
+    parser.add_argument("--db", default=None, help="URL do banco (padrão: DATABASE_URL ou sqlite:///bench.db)")
+    parser.add_argument("--env", action="append", default=[], help="variável extra para o processo, ex: DB_POOL_MODE=null")
+    parser.add_argument("--profile", type=int, default=0, help="mostra os N módulos mais caros no import")
+    parser.add_argument("--output", help="grava o relatório JSON neste arquivo")
+    args = parser.parse_args()
+
+    database = seed.setup_database(args.db)
+    if args.rows:
+        seed.seed_scanners(database, args.rows)
+
+    env = dict(os.environ)
+    for item in args.env:
+        name, _, value = item.partition("=")
+        env[name] = value
+
+    runs = [run_once(args.path, env)[0] for _ in range(args.runs)]
+    report = {
+        "path": args.path,
+        "runs": args.runs,
+        "env": args.env,
+        "status": sorted({run["status"] for run in runs}),
+    }
+    for key in ("import_ms", "startup_ms", "first_response_ms", "total_ms"):
+        values = [run[key] for run in runs]
+        report[key] = {"median": round(statistics.median(values), 1), "min": round(min(values), 1), "max": round(max(values), 1)}
+
+    if args.profile:
+        _, stderr = run_once(args.path, env, importtime=True)
+        report["import_profile_ms"] = [{"module": name, "ms": round(ms, 1)} for ms, name in import_profile(stderr, args.profile)]
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Teste de carga com leituras e escritas concorrentes (mede p50/p95/p99).
+
+Por padrão roda a API dentro do processo (httpx + ASGITransport) sobre um SQLite
+populado; com --url mede um servidor de verdade (ex: uvicorn main:app).
+Para comparar antes/depois de uma mudança, rode o mesmo comando nos dois commits
+e compare os JSON gerados com --output. A medição antes/depois do motor assíncrono
+está em benchmarks/results/async_engine.json.
+
+Uso (a partir da pasta api/, com pip install -r benchmarks/requirements.txt):
+    python -m benchmarks.load_test --concurrency 32 --requests 3000 --write-ratio 0.1
+    python -m benchmarks.load_test --no-cache            # força todas as leituras a irem ao banco
+    python -m benchmarks.load_test --url http://localhost:8000 --email admin@x --password ...
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from benchmarks import seed, stats
+
+BENCH_EMAIL = "bench@dal.com.br"
+BENCH_PASSWORD = "bench-password"
+
+SEARCH_TERMS = ["zebra", "honeywell", "voyager", "datalogic", "bluetooth", "ds2208", "leitor"]
+
+
+def read_request(rng: random.Random, rows: int):
+    """Sorteia uma leitura parecida com o tráfego do site"""
+    kind = rng.random()
+    if kind < 0.45:
+        return "list", "/api/scanners", {"page": rng.randint(1, 20), "limit": 12, "in_stock": "true"}
+    if kind < 0.65:
+        return "search", "/api/scanners", {"search": rng.choice(SEARCH_TERMS), "limit": 12}
+    if kind < 0.90:
+        return "by_id", f"/api/scanners/{rng.randint(1, max(rows, 1))}", None
+    return "price_ranges", "/api/scanners/filters/price-ranges", None
+
+
+async def run_worker(client, rng, rows, deadline_count, write_ratio, headers, results):
+    while deadline_count[0] > 0:
+        deadline_count[0] -= 1
+        started = time.perf_counter()
+        if rng.random() < write_ratio:
+            kind = "write"
+            scanner_id = rng.randint(1, max(rows, 1))
+            response = await client.put(f"/api/scanners/{scanner_id}", headers=headers, json={
+                "model": f"Bench {scanner_id}",
+                "brand": rng.choice(list(seed.BRANDS)),
+                "item_condition": rng.choice(seed.CONDITIONS),
+                "original_price": 1000,
+                "sale_price": round(rng.uniform(200, 900), 2),
+                "in_stock": True,
+            })
+        else:
+            kind, path, params = read_request(rng, rows)
+            response = await client.get(path, params=params)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        results.setdefault(kind, []).append(elapsed_ms)
+        if response.status_code >= 500:
+            results.setdefault("errors", []).append(elapsed_ms)
+
+
+async def prepare_in_process(rows: int):
+    """Popula o SQLite e cria o usuário do benchmark; devolve (app, token)"""
+    database = seed.setup_database()
+    if rows:
+        seed.seed_scanners(database, rows)
+
+    from routers import auth
+    from main import app
+
+    seed.ensure_user(database, BENCH_EMAIL, BENCH_PASSWORD)
+
+    return app, auth.create_access_token(data={"sub": BENCH_EMAIL})
+
+
+async def main_async(args):
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        login = await client.post("/api/login", json={"email": args.email, "password": args.password})
+        login.raise_for_status()
+        token = login.json()["access_token"]
+        app = None
+    else:
+        app, token = await prepare_in_process(args.rows)
+        await app.router.startup()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    headers = {"Authorization": f"Bearer {token}"}
+    results = {}
+    remaining = [args.requests]
+    rngs = [random.Random(args.seed + i) for i in range(args.concurrency)]
+
+    started = time.perf_counter()
+    async with client:
+        await asyncio.gather(*(
+            run_worker(client, rng, args.rows, remaining, args.write_ratio, headers, results) for rng in rngs
+        ))
+    elapsed = time.perf_counter() - started
+
+    if app is not None:
+        await app.router.shutdown()
+
+    reads = [v for kind, values in results.items() if kind not in ("write", "errors") for v in values]
+    report = {
+        "target": args.url or "in-process",
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "write_ratio": args.write_ratio,
+        "cache": not args.no_cache,
+        "elapsed_s": round(elapsed, 3),
+        "overall": stats.summarize(reads + results.get("write", []), elapsed),
+        "reads": stats.summarize(reads),
+        "writes": stats.summarize(results.get("write", [])),
+        "errors": len(results.get("errors", [])),
+        "by_kind": {kind: stats.summarize(values) for kind, values in sorted(results.items()) if kind != "errors"},
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="servidor a testar (padrão: API dentro do processo)")
+    parser.add_argument("--email", default=BENCH_EMAIL)
+    parser.add_argument("--password", default=BENCH_PASSWORD)
+    parser.add_argument("--rows", type=int, default=5000, help="scanners a gerar no modo dentro do processo")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-cache", action="store_true", help="desliga o cache do catálogo (CATALOG_CACHE_TTL=0)")
+    parser.add_argument("--output", help="grava o relatório JSON neste arquivo")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        os.environ["CATALOG_CACHE_TTL"] = "0"
+
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
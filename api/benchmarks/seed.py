@@ -0,0 +1,147 @@
+"""
+Catálogo de teste para os benchmarks.
+
+Aponta o database.py para um banco local (SQLite por padrão) e popula a tabela
+scanners com marcas, modelos e preços realistas. Uma parte das linhas pode trazer
+imagens antigas em Base64 no image_url (blob_ratio), como no banco de produção.
+Precisa ser importado/chamado antes de qualquer módulo que importe o database.
+"""
+import base64
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+DEFAULT_DATABASE_URL = "sqlite:///bench.db"
+
+BRANDS = {
+    "Zebra": ["DS2208", "DS4608", "LI4278", "DS8178", "Symbol LS2208", "MC3300 Coletor"],
+    "Honeywell": ["Voyager 1200g", "Voyager 1450g", "Xenon 1900", "Granit 1911i", "Hyperion 1300g"],
+    "Datalogic": ["QuickScan QD2430", "QuickScan QW2120", "Gryphon GD4500", "PowerScan PD9500"],
+    "Elgin": ["EL250", "Flash Pistola", "EL5000 Fixo"],
+    "Bematech": ["S-500", "I-200", "S-3100 Sem Fio"],
+    "Gertec": ["Leitor Óptico GD-100", "SC-3000"],
+    "Newland": ["HR22 Dorada", "HR32 Marlin", "FR40 Mesa"],
+    "Tanca": ["TL-120", "TL-250 Wireless"],
+}
+CONDITIONS = ["Excelente", "Muito Bom", "Bom", "Marcas de uso leves"]
+
+# Tamanhos de catálogo nomeados (--size 1k|10k|100k|1m); também aceita um número
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+# Quantas imagens Base64 diferentes são geradas (as linhas com blob reaproveitam uma delas)
+BLOB_VARIANTS = 8
+
+
+def parse_size(value) -> int:
+    text = str(value).strip().lower()
+    if text in SIZES:
+        return SIZES[text]
+    return int(text.replace("_", ""))
+
+
+def setup_database(url: str = None):
+    """Configura o DATABASE_URL, cria as tabelas e devolve o módulo database"""
+    os.environ["DATABASE_URL"] = url or os.getenv("DATABASE_URL") or DEFAULT_DATABASE_URL
+    import database
+    import models.scanner  # noqa: F401
+    import models.user  # noqa: F401
+    import models.cache_version  # noqa: F401
+
+    database.Base.metadata.create_all(bind=database.engine)
+    return database
+
+
+def legacy_blobs(blob_kb: int, seed: int = 42):
+    """Data URIs JPEG em Base64 com cerca de blob_kb KB, como as imagens salvas antes do image_store"""
+    rng = random.Random(seed)
+    raw_size = blob_kb * 1024 * 3 // 4
+    return [
+        "data:image/jpeg;base64," + base64.b64encode(b"\xff\xd8\xff\xe0" + rng.randbytes(raw_size)).decode()
+        for _ in range(BLOB_VARIANTS)
+    ]
+
+
+def scanner_rows(count: int, seed: int = 42, start_id: int = 1, blob_ratio: float = 0.0, blob_kb: int = 24):
+    """Gera dicionários de scanners (determinístico para o mesmo seed)"""
+    rng = random.Random(seed)
+    brands = list(BRANDS)
+    base_date = datetime(2023, 1, 1)
+    blobs = legacy_blobs(blob_kb, seed) if blob_ratio > 0 else None
+    for offset in range(count):
+        brand = rng.choice(brands)
+        original = round(rng.uniform(300, 9000), 2)
+        image_url = None
+        # Só sorteia quando há blobs, para não mudar a sequência dos catálogos sem imagem
+        if blobs and rng.random() < blob_ratio:
+            image_url = blobs[offset % BLOB_VARIANTS]
+        yield {
+            "id": start_id + offset,
+            "model": f"{rng.choice(BRANDS[brand])} {rng.choice(['', 'USB', 'Bluetooth', 'Kit', '2D'])}".strip(),
+            "brand": brand,
+            "item_condition": rng.choice(CONDITIONS),
+            "original_price": original,
+            "sale_price": round(original * rng.uniform(0.4, 0.9), 2),
+            "image_url": image_url,
+            "purchase_link": "https://wa.me/5511999999999",
+            "in_stock": rng.random() < 0.8,
+            "created_date": base_date + timedelta(minutes=rng.randrange(0, 60 * 24 * 900)),
+        }
+
+
+def _signature_path(database):
+    """Arquivo ao lado do SQLite que registra com que parâmetros ele foi populado"""
+    url = database.engine.url
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return None
+    return url.database + ".seed.json"
+
+
+def seed_scanners(database, count: int, seed: int = 42, batch_size: int = 5000,
+                  blob_ratio: float = 0.0, blob_kb: int = 24, reuse: bool = False) -> bool:
+    """
+    Recria a tabela scanners com count linhas, inseridas em lotes.
+    Com reuse=True, um SQLite já populado com os mesmos parâmetros é mantido (útil com 1M
+    de linhas). Retorna se a tabela foi recriada.
+    """
+    from sqlalchemy import delete, func, insert, select
+    from models.scanner import Scanner
+
+    signature = {"count": count, "seed": seed, "blob_ratio": blob_ratio, "blob_kb": blob_kb}
+    signature_path = _signature_path(database)
+    if reuse and signature_path and os.path.exists(signature_path):
+        with open(signature_path) as f:
+            saved = json.load(f)
+        with database.engine.connect() as conn:
+            current = conn.execute(select(func.count()).select_from(Scanner)).scalar()
+        if saved == signature and current == count:
+            return False
+
+    with database.engine.begin() as conn:
+        conn.execute(delete(Scanner))
+        batch = []
+        for row in scanner_rows(count, seed, blob_ratio=blob_ratio, blob_kb=blob_kb):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.execute(insert(Scanner), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Scanner), batch)
+
+    if signature_path:
+        with open(signature_path, "w") as f:
+            json.dump(signature, f)
+    return True
+
+
+def ensure_user(database, email: str, password: str):
+    """Cria o usuário usado nos cenários autenticados (login, upload, escrita), se ainda não existir"""
+    from models.user import User
+    from routers import auth
+
+    db = database.SessionLocal()
+    try:
+        if not db.query(User).filter(User.email == email).first():
+            db.add(User(email=email, hashed_password=auth.get_password_hash(password)))
+            db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,28 @@
+"""Funções de estatística compartilhadas pelos benchmarks"""
+import math
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Percentil por interpolação linear (sorted_values precisa estar ordenado)"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(latencies_ms, elapsed_s: float = None) -> dict:
+    values = sorted(latencies_ms)
+    summary = {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+    }
+    if elapsed_s:
+        summary["throughput_rps"] = round(len(values) / elapsed_s, 1)
+    return summary
@@ -0,0 +1,330 @@
+"""
+Suíte de benchmark por cenário, sobre um catálogo semeado e reprodutível.
+
+Popula um SQLite (ou o banco de --db) com 1k/100k/1M scanners, parte deles com imagens
+antigas em Base64 no image_url, sobe a API dentro do processo (httpx + ASGITransport) e
+mede cada cenário separadamente na concorrência pedida: listagem, paginação profunda
+(offset e cursor), busca, filtros, faixas de preço, facetas, detalhe por id,
+relacionados, login e upload.
+O relatório (JSON) traz throughput, p50/p95/p99, erros e o pico de memória (RSS) do processo.
+
+Com --baseline, compara com um relatório anterior e sai com código 1 se algum cenário
+piorar além da tolerância (p95, throughput, erros ou pico de RSS).
+
+Uso (a partir da pasta api/, com pip install -r benchmarks/requirements.txt):
+    python -m benchmarks.suite --size 100k --output baseline.json
+    python -m benchmarks.suite --size 100k --baseline baseline.json --tolerance 0.2
+    python -m benchmarks.suite --size 1m --reuse --scenarios listing,deep_cursor,by_id
+    python -m benchmarks.suite --size 1k --no-cache --concurrency 64 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks import seed, stats
+
+try:
+    import resource
+except ImportError:  # Windows não tem o módulo resource: o RSS fica de fora do relatório
+    resource = None
+
+BENCH_EMAIL = "bench@dal.com.br"
+BENCH_PASSWORD = "bench-password"
+PAGE_SIZE = 12
+SEARCH_TERMS = ["zebra", "honeywell", "voyager", "datalogic", "bluetooth", "ds2208", "leitor", "sem fio"]
+# Quantas posições fundas (últimos 10% do catálogo) são pré-calculadas para os cenários de paginação
+DEEP_ANCHORS = 64
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+
+class Context:
+    """O que os cenários precisam saber sobre o catálogo e a sessão"""
+
+    def __init__(self, rows: int, headers: dict, deep_cursors: list, upload_bytes: int):
+        self.rows = rows
+        self.pages = max(rows // PAGE_SIZE, 1)
+        self.headers = headers
+        self.deep_cursors = deep_cursors
+        self.upload_bytes = upload_bytes
+
+
+# --- Cenários: cada um faz uma requisição e devolve a resposta ---
+
+async def listing(client, rng, ctx):
+    params = {"page": rng.randint(1, 5), "limit": PAGE_SIZE}
+    if rng.random() < 0.5:
+        params["in_stock"] = "true"
+    return await client.get("/api/scanners", params=params)
+
+
+async def deep_offset(client, rng, ctx):
+    # Últimos 10% das páginas: o OFFSET precisa pular quase a tabela inteira
+    first = max(ctx.pages - ctx.pages // 10, 1)
+    return await client.get("/api/scanners", params={"page": rng.randint(first, ctx.pages), "limit": PAGE_SIZE})
+
+
+async def deep_cursor(client, rng, ctx):
+    # Mesmas profundidades do deep_offset, mas continuando de um cursor (keyset)
+    params = {"limit": PAGE_SIZE, "include_total": "false"}
+    if ctx.deep_cursors:
+        params["cursor"] = rng.choice(ctx.deep_cursors)
+    return await client.get("/api/scanners", params=params)
+
+
+async def search(client, rng, ctx):
+    return await client.get("/api/scanners", params={"search": rng.choice(SEARCH_TERMS), "limit": PAGE_SIZE})
+
+
+async def filtered(client, rng, ctx):
+    low = rng.choice([0, 200, 500, 1000, 2000])
+    params = {
+        "brand": rng.choice(list(seed.BRANDS)),
+        "min_price": low,
+        "max_price": low + rng.choice([500, 1000, 3000]),
+        "in_stock": "true",
+        "sort": rng.choice(["price_asc", "price_desc", "newest"]),
+        "limit": PAGE_SIZE,
+    }
+    return await client.get("/api/scanners", params=params)
+
+
+async def price_ranges(client, rng, ctx):
+    params = {"in_stock": "true"} if rng.random() < 0.5 else None
+    return await client.get("/api/scanners/filters/price-ranges", params=params)
+
+
+async def facets(client, rng, ctx):
+    params = {"brand": rng.choice(list(seed.BRANDS))} if rng.random() < 0.5 else None
+    return await client.get("/api/scanners/facets", params=params)
+
+
+async def by_id(client, rng, ctx):
+    return await client.get(f"/api/scanners/{rng.randint(1, max(ctx.rows, 1))}")
+
+
+async def related(client, rng, ctx):
+    return await client.get(f"/api/scanners/{rng.randint(1, max(ctx.rows, 1))}/related", params={"limit": 4})
+
+
+async def login(client, rng, ctx):
+    return await client.post("/api/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+
+
+async def upload(client, rng, ctx):
+    # Conteúdo diferente a cada envio: mede a gravação, não a deduplicação
+    content = PNG_HEADER + rng.randbytes(ctx.upload_bytes)
+    files = {"file": ("bench.png", content, "image/png")}
+    return await client.post("/api/upload", files=files, headers=ctx.headers)
+
+
+# Nome -> (cenário, fração de --requests). Login e upload são limitados pelo bcrypt e pelo disco.
+SCENARIOS = {
+    "listing": (listing, 1.0),
+    "deep_offset": (deep_offset, 1.0),
+    "deep_cursor": (deep_cursor, 1.0),
+    "search": (search, 1.0),
+    "filter": (filtered, 1.0),
+    "price_ranges": (price_ranges, 1.0),
+    "facets": (facets, 1.0),
+    "by_id": (by_id, 1.0),
+    "related": (related, 1.0),
+    "login": (login, 0.1),
+    "upload": (upload, 0.25),
+}
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo até agora (None sem o módulo resource)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB; macOS em bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def run_scenario(client, scenario, ctx, requests: int, concurrency: int, warmup: int, seed_value: int):
+    """Roda requests chamadas do cenário com concurrency workers; devolve o resumo"""
+    warm_rng = random.Random(seed_value - 1)
+    for _ in range(warmup):
+        await scenario(client, warm_rng, ctx)
+
+    latencies = []
+    statuses = {}
+    remaining = [requests]
+
+    async def worker(rng):
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            response = await scenario(client, rng, ctx)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(random.Random(seed_value + i)) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    summary = stats.summarize(latencies, elapsed)
+    summary["errors"] = sum(count for status, count in statuses.items() if status >= 400)
+    summary["statuses"] = {str(status): count for status, count in sorted(statuses.items())}
+    summary["peak_rss_mb"] = peak_rss_mb()
+    return summary
+
+
+def deep_cursors(database, rows: int):
+    """Cursores (ordenação newest) apontando para posições nos últimos 10% do catálogo"""
+    from sqlalchemy import select
+    from models.scanner import Scanner
+    from services import pagination
+
+    if rows < PAGE_SIZE * 2:
+        return []
+    rng = random.Random(rows)
+    offsets = sorted({rng.randint(rows - rows // 10, rows - PAGE_SIZE) for _ in range(DEEP_ANCHORS)})
+    query = select(Scanner.created_date, Scanner.id).order_by(Scanner.created_date.desc(), Scanner.id.desc())
+    cursors = []
+    with database.engine.connect() as conn:
+        for offset in offsets:
+            created_date, last_id = conn.execute(query.offset(offset).limit(1)).one()
+            cursors.append(pagination.encode_cursor("newest", created_date, last_id))
+    return cursors
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_delta_ms: float):
+    """Lista as regressões de report em relação a baseline"""
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance) and current["p95_ms"] - previous["p95_ms"] > min_delta_ms:
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current.get("throughput_rps") and previous.get("throughput_rps") and \
+                current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s")
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: erros {previous.get('errors', 0)} -> {current['errors']}")
+
+    if report.get("peak_rss_mb") and baseline.get("peak_rss_mb") and \
+            report["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"pico de RSS {baseline['peak_rss_mb']} -> {report['peak_rss_mb']} MB")
+    return regressions
+
+
+async def main_async(args, names):
+    import httpx
+
+    rows = seed.parse_size(args.size)
+    database = seed.setup_database(args.db)
+
+    started = time.perf_counter()
+    seeded = seed.seed_scanners(
+        database, rows, seed=args.seed, blob_ratio=args.blob_ratio, blob_kb=args.blob_kb, reuse=args.reuse,
+    )
+    seed_s = time.perf_counter() - started
+    seed.ensure_user(database, BENCH_EMAIL, BENCH_PASSWORD)
+
+    from routers import auth
+    from main import app
+
+    started = time.perf_counter()
+    await app.router.startup()
+    startup_s = time.perf_counter() - started
+
+    ctx = Context(
+        rows=rows,
+        headers={"Authorization": f"Bearer {auth.create_access_token(data={'sub': BENCH_EMAIL})}"},
+        deep_cursors=deep_cursors(database, rows) if "deep_cursor" in names else [],
+        upload_bytes=args.upload_kb * 1024,
+    )
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for index, name in enumerate(names):
+            scenario, fraction = SCENARIOS[name]
+            requests = max(int(args.requests * fraction), args.concurrency)
+            results[name] = await run_scenario(
+                client, scenario, ctx, requests, args.concurrency, args.warmup, args.seed + index * 1000,
+            )
+            print(f"  {name:<13} p95 {results[name]['p95_ms']:>9} ms  {results[name].get('throughput_rps', 0):>8} req/s", file=sys.stderr)
+
+    await app.router.shutdown()
+
+    return {
+        "size": rows,
+        "seed": args.seed,
+        "blob_ratio": args.blob_ratio,
+        "blob_kb": args.blob_kb,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "cache": not args.no_cache,
+        "database": database.engine.url.get_backend_name(),
+        "python": platform.python_version(),
+        "seeded": seeded,
+        "seed_s": round(seed_s, 2),
+        "startup_s": round(startup_s, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="1k", help=f"scanners no catálogo: {', '.join(seed.SIZES)} ou um número")
+    parser.add_argument("--db", default=None, help="URL do banco (padrão: DATABASE_URL ou sqlite:///bench.db)")
+    parser.add_argument("--reuse", action="store_true", help="não repopula um SQLite já semeado com os mesmos parâmetros")
+    parser.add_argument("--blob-ratio", type=float, default=0.02, help="fração das linhas com imagem Base64 no image_url")
+    parser.add_argument("--blob-kb", type=int, default=24, help="tamanho de cada imagem Base64")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="cenários separados por vírgula")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requisições por cenário (login e upload usam uma fração)")
+    parser.add_argument("--warmup", type=int, default=10, help="requisições descartadas antes de medir cada cenário")
+    parser.add_argument("--upload-kb", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-cache", action="store_true", help="desliga o cache do catálogo (CATALOG_CACHE_TTL=0)")
+    parser.add_argument("--output", help="grava o relatório JSON neste arquivo")
+    parser.add_argument("--baseline", help="relatório anterior para comparar; sai com código 1 se houver regressão")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="piora relativa aceita antes de acusar regressão")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="diferença de p95 abaixo disso é ruído")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Cenários desconhecidos: {', '.join(unknown)}. Use: {', '.join(SCENARIOS)}")
+
+    if args.no_cache:
+        os.environ["CATALOG_CACHE_TTL"] = "0"
+    # Uploads do benchmark não vão para a pasta de imagens do projeto
+    os.environ.setdefault("IMAGE_STORE_DIR", tempfile.mkdtemp(prefix="bench-images-"))
+
+    report = asyncio.run(main_async(args, names))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("size") != report["size"] or baseline.get("concurrency") != report["concurrency"]:
+            print("Aviso: o baseline foi gerado com outro tamanho de catálogo ou concorrência", file=sys.stderr)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("Regressões em relação ao baseline:", file=sys.stderr)
+            for line in regressions:
+                print(f"  - {line}", file=sys.stderr)
+            sys.exit(1)
+        print("Sem regressões em relação ao baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,135 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from services import instrumentation
 
 # Carrega as variáveis do arquivo .env
 load_dotenv()
 
-# Monta a URL de conexão (MySQL com pymysql)
-DATABASE_URL = f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}?charset=utf8mb4"
+# Monta a URL de conexão (MySQL com pymysql). DATABASE_URL permite apontar para
+# outro banco (ex: sqlite:///bench.db nos benchmarks)
+DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}?charset=utf8mb4"
 
-# Cria o motor de conexão
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,  # Verifica conexão antes de usar
-    pool_recycle=3600    # Recicla conexões a cada 1 hora
-)
+# Drivers assíncronos equivalentes (aiomysql em produção, aiosqlite em testes/benchmarks)
+_ASYNC_DRIVERS = {
+    "mysql+pymysql://": "mysql+aiomysql://",
+    "mysql://": "mysql+aiomysql://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+
+
+def to_async_url(url: str) -> str:
+    for sync_prefix, async_prefix in _ASYNC_DRIVERS.items():
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Estratégia de conexão (DB_POOL_MODE):
+# - queue: pool persistente por instância (servidor comum ou função que fica "quente")
+# - null: abre e fecha uma conexão por uso (NullPool); use com um pooler externo
+#   (ProxySQL, PlanetScale, RDS Proxy) quando há muitas instâncias curtas, como na Vercel
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue")
+
+# Tamanho do pool por instância. O total de conexões no MySQL é
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW) x número de instâncias, então mantenha baixo na Vercel.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))  # Segundos esperando uma conexão livre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # Recicla conexões a cada 1 hora
+# pre_ping custa uma ida ao banco a cada checkout; com DB_POOL_RECYCLE abaixo do
+# wait_timeout do MySQL dá para desligar (DB_PRE_PING=false)
+DB_PRE_PING = os.getenv("DB_PRE_PING", "true").lower() == "true"
+
+
+def _pool_options(url: str, is_async: bool = False) -> dict:
+    if url.startswith("sqlite"):
+        # No aiosqlite o padrão do SQLAlchemy 2.0 é NullPool: cada sessão abriria uma conexão
+        # e uma thread novas. Num arquivo, mantém as conexões num pool como o motor síncrono.
+        if is_async and ":memory:" not in url and url.rstrip("/") != "sqlite+aiosqlite:":
+            return {"poolclass": instrumentation.TimedAsyncAdaptedQueuePool}
+        return {}  # SQLite síncrono usa o pool padrão do SQLAlchemy (sem dimensionamento)
+    # As classes Timed* são os pools do SQLAlchemy medindo a espera por conexão (ver /metrics)
+    if DB_POOL_MODE == "null":
+        return {"poolclass": instrumentation.TimedNullPool}
+    if DB_POOL_MODE != "queue":
+        raise ValueError(f"DB_POOL_MODE inválido: {DB_POOL_MODE} (use queue ou null)")
+    return {
+        "poolclass": instrumentation.TimedAsyncAdaptedQueuePool if is_async else instrumentation.TimedQueuePool,
+        "pool_pre_ping": DB_PRE_PING,  # Verifica conexão antes de usar
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
 
-# Cria a sessão
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-# Função para pegar o banco de dados em cada requisição
+# Os motores e as fábricas de sessão são criados no primeiro uso (database.engine,
+# database.AsyncSessionLocal, ...), e não no import: a API não usa o motor síncrono,
+# e o driver do banco só é carregado quando a primeira requisição precisa dele.
+_lazy = {}
+
+
+def _create_engine():
+    # Motor de conexão síncrono (scripts como create_admin.py e migrações)
+    return create_engine(DATABASE_URL, **_pool_options(DATABASE_URL))
+
+
+def _create_session_local():
+    return sessionmaker(autocommit=False, autoflush=False, bind=__getattr__("engine"))
+
+
+def _create_async_engine():
+    # Motor assíncrono usado pelas rotas da API (não bloqueia o event loop)
+    return create_async_engine(ASYNC_DATABASE_URL, **_pool_options(ASYNC_DATABASE_URL, is_async=True))
+
+
+def _create_async_session_local():
+    # expire_on_commit=False: os objetos continuam legíveis depois do commit sem nova consulta
+    return async_sessionmaker(__getattr__("async_engine"), autoflush=False, expire_on_commit=False)
+
+
+_FACTORIES = {
+    "engine": _create_engine,
+    "SessionLocal": _create_session_local,
+    "async_engine": _create_async_engine,
+    "AsyncSessionLocal": _create_async_session_local,
+}
+
+
+def __getattr__(name):
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name not in _lazy:
+        _lazy[name] = factory()
+    return _lazy[name]
+
+
+# Função para pegar o banco de dados em cada requisição (versão síncrona)
 def get_db():
-    db = SessionLocal()
+    db = __getattr__("SessionLocal")()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Versão assíncrona, usada pelas rotas
+async def get_async_db():
+    async with __getattr__("AsyncSessionLocal")() as db:
+        yield db
+
+# Fecha as conexões dos motores já criados (desligamento da aplicação). Sem isso a thread
+# de cada conexão aiosqlite segura o processo aberto depois do fim
+async def dispose_engines():
+    if "async_engine" in _lazy:
+        await _lazy["async_engine"].dispose()
+    if "engine" in _lazy:
+        _lazy["engine"].dispose()
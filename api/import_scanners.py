@@ -0,0 +1,71 @@
+# backend/import_scanners.py
+# Importação offline de scanners a partir de um arquivo NDJSON ou CSV (mesmo formato do
+# POST /api/scanners/import e do GET /api/scanners/export).
+# Linhas com id existente atualizam só os campos informados; as demais são inseridas.
+#
+# Uso: python import_scanners.py estoque.csv [--format csv] [--batch-size 500]
+import argparse
+import json
+from database import SessionLocal
+from services import bulk
+
+
+def import_file(path: str, fmt: str, batch_size: int = bulk.BULK_BATCH_SIZE):
+    parser = bulk.RecordParser(fmt)
+    report = bulk.ImportReport()
+    db = SessionLocal()
+
+    def commit_batch(batch):
+        written = []
+        try:
+            if bulk.write_batch(db, batch, report, written) is None:
+                return
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Erro ao importar lote: {str(e)}")
+            report.fail(written)
+            return
+        report.record(written)
+        print(f"Lote gravado: {len(written)} linhas (até a linha {batch[-1][0]})")
+
+    try:
+        with open(path, "rb") as f:
+            batch = []
+            for line_no, line in bulk.iter_file_lines(f):
+                try:
+                    raw = parser.parse(line)
+                    if raw is None:
+                        continue
+                    batch.append((line_no, bulk.normalize_row(raw)))
+                except ValueError as e:
+                    if parser.header is None and parser.fmt == "csv":
+                        raise
+                    report.add_error(line_no, str(e))
+                    continue
+
+                if len(batch) >= batch_size:
+                    commit_batch(batch)
+                    batch = []
+
+            if batch:
+                commit_batch(batch)
+    finally:
+        db.close()
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa scanners de um arquivo NDJSON ou CSV")
+    parser.add_argument("path", help="arquivo .ndjson ou .csv")
+    parser.add_argument("--format", choices=bulk.FORMATS, help="padrão: pela extensão do arquivo")
+    parser.add_argument("--batch-size", type=int, default=bulk.BULK_BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    result = import_file(args.path, fmt, max(1, args.batch_size))
+    summary = result.to_dict()
+    for error in summary["errors"]:
+        print(f"Linha {error['line']}: {error['error']}")
+    print(json.dumps({key: summary[key] for key in ("inserted", "updated", "failed")}))
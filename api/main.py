@@ -1,8 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from routers import products, auth
+from sqlalchemy import text
+from routers import bulk, products, auth, images
+import database
+import services.search as search_service
+from fastapi.responses import PlainTextResponse
+from services import image_store, metrics, related
+from services.compression import CompressionMiddleware
+from services.instrumentation import InstrumentationMiddleware
+from services.serialization import FastJSONResponse
+import os
+import secrets
+import time
 
-app = FastAPI()
+# Respostas JSON codificadas com orjson (quando instalado)
+app = FastAPI(default_response_class=FastJSONResponse)
 
 
 app.add_middleware(
@@ -13,9 +26,109 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Seus Routers
+# gzip/brotli nas respostas acima do limite (listagens, detalhes, exportações)
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")))
+
+# Latência por rota, consultas SQL, espera do pool e bytes enviados (Server-Timing + /metrics).
+# Adicionado por último para ficar por fora de todos: mede os bytes já comprimidos.
+app.add_middleware(InstrumentationMiddleware)
+
+# /metrics exige "Authorization: Bearer <METRICS_TOKEN>", como as outras rotas de estatísticas
+# exigem login. Sem METRICS_TOKEN a rota fica fechada; METRICS_PUBLIC=true abre (só para dev).
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "false").lower() == "true"
+
+# Seus Routers (bulk antes de products: /scanners/export não pode cair em /scanners/{scanner_id})
+app.include_router(bulk.router)
 app.include_router(products.router)
 app.include_router(auth.router)
+app.include_router(images.router)
+
+# Aquecimento na subida do processo. Em funções serverless (Vercel, AWS Lambda), onde cada
+# cold start conta, o padrão é não aquecer: chame GET /api/warmup (ex: por um cron) para
+# aquecer sem atrasar a primeira resposta; sem isso, índice e facetas são montados no primeiro uso.
+SERVERLESS = bool(os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "false" if SERVERLESS else "true").lower() == "true"
+# O índice de relacionados leva alguns segundos em catálogos grandes (~6 s com 100k linhas):
+# fica fora do aquecimento da subida, a menos que WARM_RELATED_ON_STARTUP=true. Sem ele, é
+# montado pelo GET /api/warmup ou na primeira consulta de relacionados.
+WARM_RELATED_ON_STARTUP = os.getenv("WARM_RELATED_ON_STARTUP", "false").lower() == "true"
+
+async def warm_up(include_related: bool = True) -> dict:
+    """
+    Abre a primeira conexão do pool, carrega o stack de autenticação e monta o índice de
+    busca, as facetas pré-calculadas e (com include_related) os relacionados. Retorna quanto
+    cada etapa levou (ms); chamadas seguintes só refazem o que estiver desatualizado.
+    """
+    steps = {}
+
+    async def step(name, coroutine_fn):
+        started = time.perf_counter()
+        try:
+            await coroutine_fn()
+            steps[name] = round((time.perf_counter() - started) * 1000, 1)
+        except Exception as e:
+            print(f"Erro no aquecimento ({name}): {str(e)}")
+            steps[name] = None
+
+    async def connect():
+        async with database.async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def search_index():
+        if not getattr(search_service.backend, "built", False):
+            async with database.AsyncSessionLocal() as db:
+                await search_service.backend.warm(db)
+
+    async def related_index():
+        if not related.index.built:
+            async with database.AsyncSessionLocal() as db:
+                await related.index.warm(db)
+
+    async def crypto():
+        await run_in_threadpool(auth.load_crypto)
+
+    await step("database", connect)
+    await step("auth", crypto)
+    await step("search_index", search_index)
+    await step("facets", products.refresh_base_facets)
+    if include_related:
+        await step("related", related_index)
+    return steps
+
+@app.on_event("startup")
+def check_image_store():
+    # Sem armazenamento de imagens só o upload fica de fora (responde 503): avisa no log da subida
+    reason = image_store.unavailable_reason()
+    if reason:
+        print(f"Aviso: upload de imagens desativado: {reason}")
+
+@app.on_event("startup")
+async def warm_on_startup():
+    if WARM_ON_STARTUP:
+        await warm_up(include_related=WARM_RELATED_ON_STARTUP)
+
+@app.on_event("shutdown")
+async def close_database():
+    await database.dispose_engines()
+
+@app.get("/api/warmup")
+async def warmup_route():
+    """Aquece a instância (conexão, autenticação, índice de busca, facetas e relacionados)"""
+    return {"warm_ms": await warm_up()}
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(request: Request):
+    """Métricas no formato do Prometheus"""
+    if not METRICS_PUBLIC:
+        if not METRICS_TOKEN:
+            raise HTTPException(status_code=403, detail="Métricas desativadas: defina METRICS_TOKEN")
+        authorization = request.headers.get("authorization", "")
+        if not secrets.compare_digest(authorization.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+            raise HTTPException(
+                status_code=401, detail="Token de métricas inválido", headers={"WWW-Authenticate": "Bearer"},
+            )
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,172 @@
+# backend/migrate_images.py
+# Migração única: tira as imagens Base64 (data URIs) da tabela scanners,
+# grava no armazenamento de imagens e troca a coluna pela URL curta.
+#
+# O data URI é a única cópia da imagem: antes de trocar cada lote, o valor original vai
+# para o arquivo de backup (NDJSON). Confira as imagens migradas antes de apagá-lo; se algo
+# der errado, --restore devolve os data URIs ao banco.
+#
+# Uso: IMAGE_STORE_DIR=/caminho/persistente python migrate_images.py --base-url https://api.dal.com.br
+#      python migrate_images.py --dry-run                  # grava as imagens mas não altera o banco
+#      python migrate_images.py --restore migrate_images_backup.ndjson
+import argparse
+import base64
+import binascii
+import json
+import os
+import sys
+from database import SessionLocal
+from models.scanner import Scanner
+from services import catalog_version, image_store
+
+BATCH_SIZE = 20  # Poucas linhas por vez: cada data URI pode ter vários MB
+DEFAULT_BACKUP = "migrate_images_backup.ndjson"
+
+
+def parse_data_uri(value: str):
+    """Extrai os bytes de um data URI no formato data:<tipo>;base64,<conteúdo>"""
+    header, _, payload = value.partition(",")
+    if not header.startswith("data:") or not header.endswith(";base64"):
+        return None
+    try:
+        return base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def write_backup(backup, originals):
+    """Grava os valores originais do lote no backup (e no disco) antes do commit que os substitui"""
+    for scanner_id, image_data in originals:
+        backup.write(json.dumps({"id": scanner_id, "image_url": image_data}) + "\n")
+    backup.flush()
+    os.fsync(backup.fileno())
+
+
+def migrate_images(base_url: str, backup_path: str, dry_run: bool = False):
+    db = SessionLocal()
+    migrated = skipped = 0
+    last_id = 0
+    backup = None if dry_run else open(backup_path, "x")
+
+    try:
+        while True:
+            rows = (
+                db.query(Scanner.id, Scanner.image_url)
+                .filter(Scanner.id > last_id, Scanner.image_url.like("data:%"))
+                .order_by(Scanner.id)
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+
+            originals = []
+            for scanner_id, image_data in rows:
+                last_id = scanner_id
+                data = parse_data_uri(image_data)
+                if data is None:
+                    print(f"Scanner {scanner_id}: data URI inválido, mantido como está")
+                    skipped += 1
+                    continue
+
+                try:
+                    image_hash = image_store.save_bytes(data)
+                except image_store.InvalidImageError:
+                    print(f"Scanner {scanner_id}: formato de imagem não suportado, mantido como está")
+                    skipped += 1
+                    continue
+
+                # Só troca a coluna se a imagem está mesmo no armazenamento
+                found = image_store.open_image(image_hash)
+                if found is None or found[1] != len(data):
+                    print(f"Scanner {scanner_id}: imagem não confirmada no armazenamento, mantida como está")
+                    skipped += 1
+                    continue
+
+                url = image_store.image_url(image_hash, base_url)
+                if not dry_run:
+                    originals.append((scanner_id, image_data))
+                    db.query(Scanner).filter(Scanner.id == scanner_id).update(
+                        {Scanner.image_url: url}, synchronize_session=False
+                    )
+                migrated += 1
+                print(f"Scanner {scanner_id}: {len(data)} bytes -> {url}")
+
+            if not dry_run and originals:
+                write_backup(backup, originals)
+                # Nova versão do catálogo no mesmo commit: ETags, caches e índices de todas as instâncias se renovam
+                catalog_version.bump_sync(db)
+                db.commit()
+            # Libera as strings enormes do lote anterior
+            db.expunge_all()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        if backup is not None:
+            backup.close()
+
+    print(f"Migração concluída: {migrated} imagens migradas, {skipped} ignoradas")
+    if not dry_run:
+        print(f"Originais guardados em {backup_path}: confira as imagens antes de apagá-lo")
+
+
+def restore_images(backup_path: str):
+    """Devolve ao banco os data URIs guardados no backup de uma migração"""
+    db = SessionLocal()
+    restored = 0
+    try:
+        with open(backup_path) as backup:
+            batch = []
+            for line in backup:
+                if line.strip():
+                    batch.append(json.loads(line))
+                if len(batch) >= BATCH_SIZE:
+                    restored += _restore_batch(db, batch)
+                    batch = []
+            if batch:
+                restored += _restore_batch(db, batch)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    print(f"Restauração concluída: {restored} imagens devolvidas ao banco")
+
+
+def _restore_batch(db, batch) -> int:
+    for record in batch:
+        db.query(Scanner).filter(Scanner.id == record["id"]).update(
+            {Scanner.image_url: record["image_url"]}, synchronize_session=False
+        )
+    catalog_version.bump_sync(db)
+    db.commit()
+    db.expunge_all()
+    return len(batch)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra imagens Base64 do banco para o armazenamento de imagens")
+    parser.add_argument("--base-url", default=image_store.PUBLIC_API_URL, help="URL pública da API (padrão: PUBLIC_API_URL)")
+    parser.add_argument("--dry-run", action="store_true", help="Grava as imagens mas não altera o banco")
+    parser.add_argument("--backup", default=DEFAULT_BACKUP, help=f"arquivo com os data URIs originais (padrão: {DEFAULT_BACKUP})")
+    parser.add_argument("--restore", metavar="BACKUP", help="devolve ao banco os data URIs de um backup e sai")
+    args = parser.parse_args()
+
+    if args.restore:
+        restore_images(args.restore)
+        sys.exit(0)
+
+    # As URLs gravadas no banco precisam continuar valendo: nada de diretório padrão nem link relativo
+    if not os.getenv("IMAGE_STORE_DIR"):
+        parser.error("defina IMAGE_STORE_DIR apontando para o armazenamento persistente que a API serve")
+    if not args.base_url:
+        parser.error("informe --base-url (ou PUBLIC_API_URL) com a URL pública da API")
+    reason = image_store.unavailable_reason()
+    if reason:
+        parser.error(reason)
+    if not args.dry_run and os.path.exists(args.backup):
+        parser.error(f"o backup {args.backup} já existe: mova-o ou use --backup com outro caminho")
+
+    migrate_images(args.base_url, args.backup, args.dry_run)
@@ -0,0 +1,26 @@
+# backend/migrate_schema.py
+# Cria as tabelas e índices que ainda não existem no banco.
+# Seguro para rodar mais de uma vez (só cria o que estiver faltando).
+#
+# Uso: python migrate_schema.py
+from database import Base, engine
+import models.scanner  # noqa: F401 - registra as tabelas no Base
+import models.user  # noqa: F401
+import models.cache_version  # noqa: F401
+
+
+def migrate_schema():
+    # Tabelas novas
+    Base.metadata.create_all(bind=engine)
+
+    # Índices novos em tabelas que já existiam (create_all não mexe nelas)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+            print(f"Índice {index.name} OK")
+
+    print("Schema atualizado com sucesso!")
+
+
+if __name__ == "__main__":
+    migrate_schema()
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, BigInteger
+from database import Base
+
+class CacheVersion(Base):
+    """Contador incrementado a cada escrita; as instâncias comparam com o que têm em cache"""
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True)  # ex: "catalog"
+    version = Column(BigInteger, nullable=False, default=0)
\ No newline at end of file
@@ -1,9 +1,19 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, DECIMAL
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, DECIMAL, Index
 from sqlalchemy.sql import func
 from database import Base
 
 class Scanner(Base):
     __tablename__ = "scanners"
+    __table_args__ = (
+        # Listagem pública: filtro de estoque + marca + faixa/ordenação de preço
+        Index("ix_scanners_stock_brand_price", "in_stock", "brand", "sale_price"),
+        # Listagem pública ordenada por mais recentes (e paginação por cursor)
+        Index("ix_scanners_stock_created", "in_stock", "created_date"),
+        # Ordenação por preço sem marca e MIN/MAX do endpoint de faixas de preço
+        Index("ix_scanners_stock_price", "in_stock", "sale_price"),
+        # Busca com SEARCH_BACKEND=fulltext (MATCH ... AGAINST); em outros bancos vira um índice comum
+        Index("ft_scanners_model_brand", "model", "brand", mysql_prefix="FULLTEXT"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     model = Column(String(255), nullable=False)
@@ -1,20 +1,41 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from database import get_db
+from database import get_async_db
 import models.user as user_model
 from fastapi.security import OAuth2PasswordBearer
+from services import metrics
+from services.auth_cache import PrincipalCache
+from services.shared_version import SharedVersion
 
 # Configurações de Segurança
-SECRET_KEY = "SEU_SEGREDO_SUPER_SECRETO_MUDE_ISSO" # Mude para uma string aleatória
+# Defina SECRET_KEY no ambiente; trocar a chave invalida todos os tokens (e o cache de tokens)
+SECRET_KEY = os.getenv("SECRET_KEY", "SEU_SEGREDO_SUPER_SECRETO_MUDE_ISSO")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 # 24 horas
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/login")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt roda num pool próprio e limitado: uma rajada de logins não ocupa as threads do catálogo.
+# Com AUTH_HASH_WORKERS ocupados e AUTH_HASH_QUEUE esperando, novos pedidos recebem 503.
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "2"))
+AUTH_HASH_QUEUE = int(os.getenv("AUTH_HASH_QUEUE", "32"))
+AUTH_RETRY_AFTER = "1"
+
+hash_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+hash_slots = asyncio.Semaphore(AUTH_HASH_WORKERS + AUTH_HASH_QUEUE)
+
+# Versão de autenticação compartilhada entre instâncias: muda quando um usuário é apagado ou alterado
+auth_version = SharedVersion("auth")
+principal_cache = PrincipalCache(SECRET_KEY)
+auth_version.subscribe(principal_cache.clear)
+
 router = APIRouter(prefix="/api", tags=["auth"])
 
 # --- Schemas ---
@@ -27,41 +48,81 @@ class Token(BaseModel):
     token_type: str
 
 # --- Funções Auxiliares ---
+
+# jose (que carrega cryptography) e passlib/bcrypt só são importados no primeiro uso:
+# a vitrine nunca precisa deles, e isso encurta o cold start na Vercel
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def load_crypto():
+    """Carrega o stack de autenticação antes da primeira requisição (usado no warm-up)"""
+    from jose import jwt  # noqa: F401
+    get_pwd_context()
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+async def run_hash(func, *args):
+    """Executa hash/verificação bcrypt no pool limitado, fora do event loop"""
+    if hash_slots.locked():
+        metrics.increment("auth_hash_rejected_total")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Muitas tentativas de login simultâneas, tente novamente",
+            headers={"Retry-After": AUTH_RETRY_AFTER},
+        )
+    async with hash_slots:
+        started = time.perf_counter()
+        result = await asyncio.get_running_loop().run_in_executor(hash_executor, func, *args)
+        metrics.observe("auth_seconds", time.perf_counter() - started, {"step": "bcrypt"})
+        return result
 
 def create_access_token(data: dict):
+    from jose import jwt
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(user_model.User).where(user_model.User.email == email))
+
+# Apagar ou alterar um usuário (ex: trocar a senha) revoga os tokens em cache em todas as instâncias
+@event.listens_for(user_model.User, "after_delete")
+@event.listens_for(user_model.User, "after_update")
+def revoke_cached_principals(mapper, connection, target):
+    auth_version.bump_connection(connection)
+    principal_cache.clear()
+
 # --- Endpoints ---
 
 # Rota para criar o primeiro usuário (apague ou proteja depois!)
 @router.post("/register")
-def register(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(user_model.User).filter(user_model.User.email == user.email).first()
+async def register(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = await get_user_by_email(db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email já cadastrado")
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await run_hash(get_password_hash, user.password)
     new_user = user_model.User(email=user.email, hashed_password=hashed_password)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     return {"message": "Usuário criado com sucesso"}
 
 # Rota de Login
 @router.post("/login", response_model=Token)
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(user_model.User).filter(user_model.User.email == user.email).first()
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    started = time.perf_counter()
+    db_user = await get_user_by_email(db, user.email)
 
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    if not db_user or not await run_hash(verify_password, user.password, db_user.hashed_password):
+        metrics.increment("auth_login_total", {"result": "failure"})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
@@ -69,14 +130,30 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
         )
 
     access_token = create_access_token(data={"sub": db_user.email})
+    metrics.increment("auth_login_total", {"result": "success"})
+    metrics.observe("auth_seconds", time.perf_counter() - started, {"step": "login"})
     return {"access_token": access_token, "token_type": "bearer"}
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as credenciais",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    started = time.perf_counter()
+
+    # Caminho rápido: token já validado há pouco e nenhum usuário alterado desde então
+    cache_key = principal_cache.key(token)
+    version = await auth_version.current()
+    principal = principal_cache.get(cache_key, version)
+    if principal is not None:
+        metrics.increment("auth_principal_cache_total", {"result": "hit"})
+        metrics.observe("auth_seconds", time.perf_counter() - started, {"step": "principal"})
+        # Objeto fora da sessão: as rotas só precisam saber quem é o usuário
+        return user_model.User(id=principal.user_id, email=principal.email)
+
+    metrics.increment("auth_principal_cache_total", {"result": "miss"})
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -85,8 +162,15 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     except JWTError:
         raise credentials_exception
 
-    user = db.query(user_model.User).filter(user_model.User.email == email).first()
+    user = await get_user_by_email(db, email)
     if user is None:
         raise credentials_exception
 
+    principal_cache.put(cache_key, user.id, user.email, payload.get("exp", 0), version)
+    metrics.observe("auth_seconds", time.perf_counter() - started, {"step": "principal"})
     return user
+
+@router.get("/auth/stats")
+async def get_auth_stats(current_user: user_model.User = Depends(get_current_user)):
+    """Taxa de acerto do cache de tokens (Requer Login)"""
+    return principal_cache.stats()
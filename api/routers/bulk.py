@@ -0,0 +1,199 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+import models.scanner as scanner_model
+import database
+from database import get_async_db
+from pydantic import BaseModel
+from routers.auth import get_current_user
+from routers.products import catalog_changed
+import models.user as user_model
+import services.search as search_service
+from services import bulk, catalog_version, related
+
+# Rotas em lote do painel admin. Este router é incluído antes do products para que
+# /scanners/export e /scanners/batch não sejam capturados por /scanners/{scanner_id}.
+router = APIRouter(prefix="/api", tags=["bulk"])
+
+MAX_BATCH_IDS = 5000
+# Campos que mudam o índice de busca e o de relacionados
+SEARCH_FIELDS = {"model", "brand"}
+RELATED_FIELDS = {"brand", "item_condition", "sale_price", "in_stock"}
+
+# --- Schemas ---
+
+class ScannerPatch(BaseModel):
+    model: Optional[str] = None
+    brand: Optional[str] = None
+    item_condition: Optional[str] = None
+    original_price: Optional[float] = None
+    sale_price: Optional[float] = None
+    image_url: Optional[str] = None
+    purchase_link: Optional[str] = None
+    in_stock: Optional[bool] = None
+
+class ScannerBatchPatch(BaseModel):
+    ids: List[int]
+    changes: ScannerPatch
+
+# --- Rotas Protegidas (Requer Login) ---
+
+async def _commit_batch(db: AsyncSession, batch, report: bulk.ImportReport) -> bool:
+    """Grava e confirma um lote; se falhar, o lote inteiro é registrado como erro"""
+    written = []
+    try:
+        version = await db.run_sync(bulk.write_batch, batch, report, written)
+        if version is None:
+            return False
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"Erro ao importar lote: {str(e)}")
+        report.fail(written)
+        return False
+
+    report.record(written)
+    catalog_changed(version)
+    return True
+
+@router.post("/scanners/import")
+async def import_scanners(
+    request: Request,
+    format: Optional[str] = None,
+    batch_size: int = bulk.BULK_BATCH_SIZE,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: user_model.User = Depends(get_current_user)
+):
+    """
+    Importa scanners em NDJSON ou CSV enviados no corpo da requisição (Requer Login).
+    Linhas com id existente atualizam só os campos informados; as demais são inseridas.
+    O corpo é lido aos poucos e gravado em lotes; o retorno lista os erros por linha.
+    """
+    try:
+        parser = bulk.RecordParser(format or bulk.format_from_content_type(request.headers.get("content-type")))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    batch_size = max(1, min(batch_size, bulk.BULK_BATCH_SIZE))
+
+    report = bulk.ImportReport()
+    batch = []
+    changed = False
+    async for line_no, line in bulk.iter_lines(request.stream()):
+        try:
+            raw = parser.parse(line)
+            if raw is None:
+                continue
+            batch.append((line_no, bulk.normalize_row(raw)))
+        except ValueError as e:
+            if parser.header is None and parser.fmt == "csv":
+                raise HTTPException(status_code=400, detail=str(e))
+            report.add_error(line_no, str(e))
+            continue
+
+        if len(batch) >= batch_size:
+            changed = await _commit_batch(db, batch, report) or changed
+            batch = []
+
+    if batch:
+        changed = await _commit_batch(db, batch, report) or changed
+
+    if changed:
+        # Modelos e marcas podem ter mudado em muitas linhas: os índices são remontados em segundo
+        # plano na próxima leitura, que segue respondendo com os atuais até a troca
+        search_service.backend.invalidate()
+        related.index.invalidate()
+    return report.to_dict()
+
+@router.patch("/scanners/batch")
+async def batch_update_scanners(
+    payload: ScannerBatchPatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: user_model.User = Depends(get_current_user)
+):
+    """Aplica as mesmas alterações (ex: in_stock, sale_price) a vários scanners num único UPDATE (Requer Login)"""
+    Scanner = scanner_model.Scanner
+    changes = payload.changes.dict(exclude_unset=True)
+    ids = sorted(set(payload.ids))
+    if not changes:
+        raise HTTPException(status_code=400, detail="Nenhum campo para alterar")
+    if not ids:
+        raise HTTPException(status_code=400, detail="Nenhum id informado")
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_BATCH_IDS} ids por requisição")
+    for name in ("model", "brand", "item_condition"):
+        if name in changes and not changes[name]:
+            raise HTTPException(status_code=400, detail=f"{name} não pode ser vazio")
+    # Preços são NOT NULL (o UPDATE falharia com 500) e in_stock nulo sumiria dos filtros de estoque
+    for name in ("original_price", "sale_price", "in_stock"):
+        if name in changes and changes[name] is None:
+            raise HTTPException(status_code=400, detail=f"{name} não pode ser nulo")
+
+    try:
+        existing = set((await db.scalars(select(Scanner.id).where(Scanner.id.in_(ids)))).all())
+        if existing:
+            await db.execute(
+                update(Scanner)
+                .where(Scanner.id.in_(existing))
+                .values(**changes)
+                .execution_options(synchronize_session=False)
+            )
+            version = await catalog_version.bump(db)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"Erro ao atualizar scanners em lote: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao atualizar scanners: {str(e)}")
+
+    if existing:
+        catalog_changed(version)
+        if changes.keys() & (SEARCH_FIELDS | RELATED_FIELDS):
+            # Atualiza os índices linha a linha em vez de descartá-los (a remontagem leva segundos)
+            rows = (await db.execute(
+                select(Scanner.id, Scanner.model, Scanner.brand, Scanner.item_condition, Scanner.sale_price, Scanner.in_stock)
+                .where(Scanner.id.in_(existing))
+            )).all()
+            await asyncio.to_thread(_reindex, rows, changes.keys())
+
+    return {"updated": len(existing), "missing": [i for i in ids if i not in existing]}
+
+def _reindex(rows, changed: set):
+    """Leva as linhas alteradas num PATCH em lote para os índices em memória (roda numa thread)"""
+    if changed & SEARCH_FIELDS:
+        for row in rows:
+            search_service.backend.on_upsert(row.id, row.model, row.brand)
+    if changed & RELATED_FIELDS:
+        related.index.on_upsert_many([
+            (row.id, row.brand, row.item_condition, row.sale_price, row.in_stock) for row in rows
+        ])
+
+@router.get("/scanners/export")
+async def export_scanners(
+    format: str = "ndjson",
+    current_user: user_model.User = Depends(get_current_user)
+):
+    """Exporta o catálogo em NDJSON ou CSV, enviando cada lote assim que é lido do banco (Requer Login)"""
+    if format not in bulk.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido: {format}")
+
+    async def generate():
+        # Sessão própria: a resposta continua sendo enviada depois que a rota retorna
+        async with database.AsyncSessionLocal() as db:
+            header = bulk.format_header(format)
+            if header:
+                yield header
+            last_id = 0
+            while True:
+                rows = (await db.execute(bulk.export_query(last_id))).all()
+                if not rows:
+                    break
+                yield bulk.format_rows(rows, format)
+                last_id = rows[-1].id
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="scanners.{format}"'},
+    )
@@ -0,0 +1,72 @@
+import re
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from services import http_cache, image_store
+
+router = APIRouter(prefix="/api", tags=["images"])
+
+# O conteúdo nunca muda para um mesmo hash, então pode ficar em cache "para sempre"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(range_header: str, size: int):
+    """Interpreta um cabeçalho Range com um único intervalo. Retorna (inicio, fim) ou None se inválido."""
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if not match or size == 0:
+        return None
+    start, end = match.groups()
+    if start == "" and end == "":
+        return None
+    if start == "":
+        # Sufixo: "bytes=-500" são os últimos 500 bytes
+        length = int(end)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = size - 1 if end == "" else min(int(end), size - 1)
+    if start > end:
+        return None
+    return start, end
+
+
+@router.get("/images/{image_hash}")
+def get_image(image_hash: str, request: Request):
+    """Serve uma imagem do armazenamento endereçado por conteúdo (suporta Range)"""
+    found = image_store.open_image(image_hash)
+    if not found:
+        raise HTTPException(status_code=404, detail="Imagem não encontrada")
+
+    path, size, content_type = found
+    etag = f'"{image_hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE,
+        "Accept-Ranges": "bytes",
+    }
+
+    # If-None-Match pode trazer uma lista de ETags (inclusive fracas, W/"...")
+    if http_cache.is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if range_header:
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            image_store.iter_file(path, start, end),
+            status_code=206,
+            media_type=content_type,
+            headers=headers,
+        )
+
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(image_store.iter_file(path), media_type=content_type, headers=headers)
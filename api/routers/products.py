@@ -1,14 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
-import base64
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Request
 from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 import models.scanner as scanner_model
-from database import get_db
+import database
+from database import get_async_db
 from pydantic import BaseModel
 from datetime import datetime
 from routers.auth import get_current_user
 import models.user as user_model
+import services.search as search_service
+from services import catalog_cache, catalog_version, facets, http_cache, image_store, pagination, related, serialization
 
 router = APIRouter(prefix="/api", tags=["products"])
 
@@ -20,7 +22,7 @@ class ScannerBase(BaseModel):
     item_condition: str
     original_price: Optional[float] = None
     sale_price: Optional[float] = None
-    image_url: Optional[str] = None # Receberá a string Base64 (Requer coluna TEXT/LONGTEXT no banco)
+    image_url: Optional[str] = None # URL curta retornada pelo /api/upload (ex: /api/images/<sha256>)
     purchase_link: Optional[str] = None
     in_stock: bool = True
 
@@ -32,8 +34,7 @@ class ScannerUpdate(ScannerBase):
 
 class ScannerResponse(ScannerBase):
     id: int
-    # created_at: datetime  <-- SE TIVER ISSO, COMENTE OU MUDE PARA:
-    created_at: Optional[datetime] = None
+    created_date: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -41,87 +42,412 @@ class ScannerResponse(ScannerBase):
 # --- Rotas Públicas (Qualquer um pode ver) ---
 
 @router.get("/scanners/filters/price-ranges")
-def get_price_ranges(db: Session = Depends(get_db)):
+async def get_price_ranges(request: Request, in_stock: Optional[bool] = None, db: AsyncSession = Depends(get_async_db)):
     """Retorna o preço mínimo e máximo dos produtos para os filtros"""
-    try:
-        result = db.query(
-            scanner_model.Scanner.sale_price
-        ).all()
+    Scanner = scanner_model.Scanner
+    etag = await http_cache.catalog_etag(request)
+    if http_cache.is_not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
 
-        prices = [float(r[0]) for r in result if r[0] is not None]
+    async def load():
+        # Um único MIN/MAX no banco (resolvido pelo índice de preço) em vez de trazer todos os preços
+        query = select(func.min(Scanner.sale_price), func.max(Scanner.sale_price))
+        if in_stock is not None:
+            query = query.filter(Scanner.in_stock == in_stock)
+        min_price, max_price = (await db.execute(query)).one()
 
-        if not prices:
+        if min_price is None:
             return {"min": 0, "max": 100000}
 
         return {
-            "min": min(prices),
-            "max": max(prices)
+            "min": float(min_price),
+            "max": float(max_price)
         }
+
+    try:
+        key = catalog_cache.make_key("price-ranges", in_stock=in_stock)
+        return http_cache.cached_json(await catalog_cache.catalog_cache.get_or_load(key, load), etag)
     except Exception as e:
         print(f"Erro ao buscar ranges: {str(e)}")
         return {"min": 0, "max": 100000}
 
+def apply_filters(
+    query,
+    search_match: Optional[search_service.SearchMatch] = None,
+    brand: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    exclude_id: Optional[int] = None,
+    price_below: Optional[float] = None,
+):
+    """Aplica os filtros da listagem pública direto no SQL"""
+    Scanner = scanner_model.Scanner
+
+    if search_match is not None:
+        query = query.filter(search_match.clause)
+
+    if in_stock is not None:
+        query = query.filter(Scanner.in_stock == in_stock)
+
+    if brand:
+        query = query.filter(Scanner.brand == brand)
+
+    if min_price is not None:
+        query = query.filter(Scanner.sale_price >= min_price)
+
+    if max_price is not None:
+        query = query.filter(Scanner.sale_price <= max_price)
+
+    # Limite exclusivo, o mesmo das faixas do histograma de preços ([min, max))
+    if price_below is not None:
+        query = query.filter(Scanner.sale_price < price_below)
+
+    # --- NOVO FILTRO ---
+    if exclude_id:
+        query = query.filter(Scanner.id != exclude_id)
+    # -------------------
+
+    return query
+
+# Ordenações disponíveis para a listagem (todas com desempate por id)
+SORTS = {
+    "newest": pagination.SortSpec(scanner_model.Scanner.created_date, True, pagination.parse_datetime),
+    "price_asc": pagination.SortSpec(scanner_model.Scanner.sale_price, False, pagination.parse_decimal),
+    "price_desc": pagination.SortSpec(scanner_model.Scanner.sale_price, True, pagination.parse_decimal),
+}
+
 @router.get("/scanners")
-def get_scanners(
+async def get_scanners(
+    request: Request,
     skip: int = 0,
     limit: int = 10,
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    exact_total: bool = False,
     search: Optional[str] = None,
     brand: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    price_below: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    sort: Optional[str] = None,
     exclude_id: Optional[int] = None, # <--- NOVO PARÂMETRO
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(scanner_model.Scanner)
-
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            or_(
-                scanner_model.Scanner.model.ilike(search_filter),
-                scanner_model.Scanner.brand.ilike(search_filter)
+    """
+    Lista os scanners com dois modos de paginação:
+    - cursor: passe o next_cursor da resposta anterior (custo igual em qualquer página)
+    - offset: passe page (ou skip); retorna total e total_pages
+    O total vem de uma contagem em cache; use exact_total=true para forçar o COUNT,
+    ou include_total=false para não contar (ex: rolagem infinita).
+    Ordenação (sort): relevance (padrão quando há busca), newest, price_asc ou price_desc.
+    fields: campos de cada item separados por vírgula (padrão: os que o card usa; o id sempre vem).
+    price_below: preço de venda estritamente menor (use com min_price para uma faixa do histograma de /facets).
+    """
+    etag = await http_cache.catalog_etag(request)
+    if http_cache.is_not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+
+    limit = max(1, min(limit, pagination.MAX_PAGE_SIZE))
+    if sort is None:
+        sort = "relevance" if search else "newest"
+    if sort != "relevance" and sort not in SORTS:
+        raise HTTPException(status_code=400, detail=f"Ordenação inválida. Use: relevance, {', '.join(SORTS)}")
+    if page is not None:
+        skip = (max(page, 1) - 1) * limit
+    skip = max(skip, 0)
+    try:
+        selected_fields = serialization.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def load():
+        return await _list_scanners(
+            db, skip=skip, limit=limit, cursor=cursor, include_total=include_total, exact_total=exact_total,
+            search=search, brand=brand, min_price=min_price, max_price=max_price, price_below=price_below,
+            in_stock=in_stock, sort=sort, exclude_id=exclude_id, fields=selected_fields,
+        )
+
+    key = catalog_cache.make_key(
+        "scanners", skip=skip, limit=limit, cursor=cursor, include_total=include_total, exact_total=exact_total,
+        search=search, brand=brand, min_price=min_price, max_price=max_price, price_below=price_below,
+        in_stock=in_stock, sort=sort, exclude_id=exclude_id, fields=",".join(selected_fields),
+    )
+    return http_cache.cached_json(await catalog_cache.catalog_cache.get_or_load(key, load), etag)
+
+async def _list_scanners(db, skip, limit, cursor, include_total, exact_total, search, brand, min_price, max_price, price_below, in_stock, sort, exclude_id, fields):
+    """
+    Consulta da listagem (chamada só quando não há resposta em cache).
+    Seleciona só as colunas pedidas, como tuplas (sem montar objetos do ORM),
+    e devolve o JSON já codificado para ser guardado no cache.
+    """
+    Scanner = scanner_model.Scanner
+    search_match = await search_service.backend.match(db, search) if search else None
+
+    # Relevância só existe quando o backend de busca sabe ranquear; senão cai para "mais recentes"
+    by_relevance = sort == "relevance" and search_match is not None and search_match.relevance is not None
+    if sort == "relevance" and not by_relevance:
+        sort = "newest"
+    if by_relevance and cursor:
+        raise HTTPException(status_code=400, detail="Paginação por cursor não disponível para sort=relevance")
+
+    def filtered(query):
+        return apply_filters(
+            query,
+            search_match=search_match,
+            brand=brand,
+            min_price=min_price,
+            max_price=max_price,
+            price_below=price_below,
+            in_stock=in_stock,
+            exclude_id=exclude_id,
+        )
+
+    sort_spec = None if by_relevance else SORTS[sort]
+    # A coluna da ordenação entra no SELECT para montar o next_cursor, mesmo que não tenha sido pedida
+    selected = list(serialization.columns(fields))
+    if sort_spec is not None and sort_spec.column.key not in fields:
+        selected.append(sort_spec.column)
+    query = filtered(select(*selected))
+
+    filter_key = (search, brand, min_price, max_price, price_below, in_stock, exclude_id)
+    async def count():
+        return await db.scalar(select(func.count()).select_from(filtered(select(Scanner.id)).subquery()))
+
+    total = None
+    if include_total:
+        if exact_total:
+            total = await count()
+        else:
+            total = await pagination.count_cache.get(filter_key, count)
+
+    if by_relevance:
+        page_query = query.order_by(search_match.relevance.desc(), Scanner.id.desc())
+    else:
+        page_query = query.order_by(*sort_spec.order_by(Scanner.id))
+
+    if cursor:
+        try:
+            value, last_id = pagination.decode_cursor(cursor, sort, sort_spec)
+        except pagination.InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        page_query = page_query.filter(sort_spec.seek(Scanner.id, value, last_id))
+        page = None
+    else:
+        page_query = page_query.offset(skip)
+        page = skip // limit + 1
+
+    # Busca um item a mais só para saber se existe próxima página
+    rows = (await db.execute(page_query.limit(limit + 1))).all()
+    scanners = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and sort_spec is not None:
+        last = scanners[-1]._mapping
+        next_cursor = pagination.encode_cursor(sort, last[sort_spec.column.key], last["id"])
+
+    encode = serialization.row_encoder(fields)
+    return serialization.dumps({
+        "total": total,
+        # Busca com resultados demais para o índice em memória: o total conta um filtro aproximado
+        "total_approximate": bool(search_match is not None and search_match.approximate),
+        "total_pages": pagination.total_pages(total, limit),
+        "page": page,
+        "next_cursor": next_cursor,
+        "scanners": [encode(row[:len(fields)]) for row in scanners],
+    })
+
+@router.get("/scanners/facets")
+async def get_facets(
+    request: Request,
+    search: Optional[str] = None,
+    brand: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    price_below: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    price_buckets: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Contagens para o painel de filtros (marcas, condições e faixas de preço) numa única consulta.
+    Cada faceta considera os demais filtros, mas não o próprio.
+    price_buckets troca os limites das faixas (ex: 500,1000,2000).
+    """
+    etag = await http_cache.catalog_etag(request)
+    if http_cache.is_not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+
+    try:
+        edges = facets.parse_edges(price_buckets) if price_buckets else facets.DEFAULT_PRICE_EDGES
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Sem busca, marca nem preço (a primeira visita): vem das variantes pré-calculadas
+    base = not search and not brand and min_price is None and max_price is None and price_below is None
+    if base and in_stock in facets.snapshots and edges == facets.DEFAULT_PRICE_EDGES:
+        version = await catalog_version.current()
+        snapshot = facets.snapshots[in_stock]
+        return http_cache.cached_json(await snapshot.get(version, lambda: _load_base_facets(in_stock)), etag)
+
+    async def load():
+        search_match = await search_service.backend.match(db, search) if search else None
+
+        def apply(query, exclude):
+            return apply_filters(
+                query,
+                search_match=search_match,
+                brand=None if exclude == "brand" else brand,
+                min_price=None if exclude == "price" else min_price,
+                max_price=None if exclude == "price" else max_price,
+                price_below=None if exclude == "price" else price_below,
+                in_stock=in_stock,
             )
+
+        return await facets.compute(db, apply, edges)
+
+    key = catalog_cache.make_key(
+        "facets", search=search, brand=brand, min_price=min_price, max_price=max_price,
+        price_below=price_below, in_stock=in_stock, price_buckets=",".join(str(edge) for edge in edges),
+    )
+    return http_cache.cached_json(await catalog_cache.catalog_cache.get_or_load(key, load), etag)
+
+async def _load_base_facets(in_stock: Optional[bool]):
+    async with database.AsyncSessionLocal() as db:
+        return await facets.compute(
+            db, lambda query, exclude: apply_filters(query, in_stock=in_stock), facets.DEFAULT_PRICE_EDGES,
         )
 
-    if brand:
-        query = query.filter(scanner_model.Scanner.brand == brand)
+async def refresh_base_facets():
+    """Recalcula as variantes pré-calculadas das facetas para a versão atual do catálogo (subida e depois de escritas)"""
+    version = await catalog_version.current()
+    for in_stock, snapshot in facets.snapshots.items():
+        await snapshot.get(version, lambda in_stock=in_stock: _load_base_facets(in_stock))
 
-    # --- NOVO FILTRO ---
-    if exclude_id:
-        query = query.filter(scanner_model.Scanner.id != exclude_id)
-    # -------------------
+@router.get("/scanners/{scanner_id}")
+async def get_scanner(scanner_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Busca um único scanner pelo id"""
+    etag = await http_cache.catalog_etag(request)
+    if http_cache.is_not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+
+    async def load():
+        Scanner = scanner_model.Scanner
+        fields = serialization.PUBLIC_FIELDS
+        row = (await db.execute(select(*serialization.columns(fields)).where(Scanner.id == scanner_id))).first()
+        return serialization.dumps(serialization.row_encoder(fields)(row)) if row else None
 
-    total = query.count()
-    scanners = query.offset(skip).limit(limit).all()
+    scanner = await catalog_cache.catalog_cache.get_or_load(catalog_cache.make_key("scanner", id=scanner_id), load)
+    if scanner is None:
+        raise HTTPException(status_code=404, detail="Scanner não encontrado")
 
-    return {"total": total, "scanners": scanners}
+    return http_cache.cached_json(scanner, etag)
+
+@router.get("/scanners/{scanner_id}/related")
+async def get_related_scanners(
+    scanner_id: int,
+    request: Request,
+    limit: int = 4,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Scanners parecidos (mesma marca, mesma condição e preço próximo), só entre os em estoque.
+    Vem do índice de relacionados em memória; os itens são buscados numa única consulta.
+    """
+    etag = await http_cache.catalog_etag(request)
+    if http_cache.is_not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+
+    try:
+        fields = serialization.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    limit = max(1, min(limit, related.RELATED_SIZE))
+
+    async def load():
+        await related.index.ensure(db)
+        ids = related.index.neighbors(scanner_id, limit)
+        if ids is None:
+            return None
+        Scanner = scanner_model.Scanner
+        rows = {}
+        if ids:
+            result = await db.execute(select(*serialization.columns(fields)).where(Scanner.id.in_(ids)))
+            rows = {row[0]: row for row in result.all()}
+        encode = serialization.row_encoder(fields)
+        # Mantém a ordem do índice (do mais para o menos parecido)
+        return serialization.dumps({"scanners": [encode(rows[i]) for i in ids if i in rows]})
+
+    key = catalog_cache.make_key("related", id=scanner_id, limit=limit, fields=",".join(fields))
+    scanners = await catalog_cache.catalog_cache.get_or_load(key, load)
+    if scanners is None:
+        raise HTTPException(status_code=404, detail="Scanner não encontrado")
+
+    return http_cache.cached_json(scanners, etag)
+
+@router.get("/cache/stats")
+async def get_cache_stats(current_user: user_model.User = Depends(get_current_user)):
+    """Contadores do cache do catálogo (Requer Login)"""
+    return catalog_cache.catalog_cache.stats()
+
+# --- Rotas Protegidas (Requer Login) ---
+
+def catalog_changed(version: int, upserted=None, deleted_id: Optional[int] = None):
+    """Chamado depois de cada escrita confirmada: invalida caches e atualiza o índice de busca"""
+    catalog_version.observe(version)
+    catalog_cache.catalog_cache.clear()
+    pagination.count_cache.clear()
+    if upserted is not None:
+        search_service.backend.on_upsert(upserted.id, upserted.model, upserted.brand)
+        related.index.on_upsert(upserted.id, upserted.brand, upserted.item_condition, upserted.sale_price, upserted.in_stock)
+    if deleted_id is not None:
+        search_service.backend.on_delete(deleted_id)
+        related.index.on_delete(deleted_id)
+    facets.schedule(refresh_base_facets)
+
+# Quando outra instância altera o catálogo, descarta o que este processo tem em memória
+catalog_version.subscribe(catalog_cache.catalog_cache.clear)
+catalog_version.subscribe(pagination.count_cache.clear)
+catalog_version.subscribe(search_service.backend.invalidate)
+catalog_version.subscribe(related.index.invalidate)
+catalog_version.subscribe(lambda: facets.schedule(refresh_base_facets))
 
 @router.post("/scanners", response_model=ScannerResponse)
-def create_scanner(
+async def create_scanner(
     scanner: ScannerCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: user_model.User = Depends(get_current_user) # <--- PROTEGIDO
 ):
     """Criar um novo scanner (Requer Login)"""
     try:
         db_scanner = scanner_model.Scanner(**scanner.dict())
         db.add(db_scanner)
-        db.commit()
-        db.refresh(db_scanner)
+        version = await catalog_version.bump(db)
+        await db.commit()
+        # Registra a própria versão antes de qualquer outro await: uma conferência da versão
+        # nesse meio tempo tomaria esta escrita por uma de outra instância e limparia tudo
+        catalog_version.observe(version)
+        await db.refresh(db_scanner)
+        catalog_changed(version, upserted=db_scanner)
         return db_scanner
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Erro ao criar scanner: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao criar scanner: {str(e)}")
 
 @router.put("/scanners/{scanner_id}")
-def update_scanner(
+async def update_scanner(
     scanner_id: int,
     scanner_update: ScannerUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: user_model.User = Depends(get_current_user) # <--- PROTEGIDO
 ):
     """Atualizar um scanner existente (Requer Login)"""
     try:
-        db_scanner = db.query(scanner_model.Scanner).filter(scanner_model.Scanner.id == scanner_id).first()
+        db_scanner = await db.get(scanner_model.Scanner, scanner_id)
         if not db_scanner:
             raise HTTPException(status_code=404, detail="Scanner não encontrado")
 
@@ -129,25 +455,30 @@ def update_scanner(
         for key, value in scanner_update.dict().items():
             setattr(db_scanner, key, value)
 
-        db.commit()
-        db.refresh(db_scanner)
+        version = await catalog_version.bump(db)
+        await db.commit()
+        # Registra a própria versão antes de qualquer outro await: uma conferência da versão
+        # nesse meio tempo tomaria esta escrita por uma de outra instância e limparia tudo
+        catalog_version.observe(version)
+        await db.refresh(db_scanner)
+        catalog_changed(version, upserted=db_scanner)
         return db_scanner
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Erro ao atualizar scanner: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao atualizar scanner: {str(e)}")
 
 @router.delete("/scanners/{scanner_id}")
-def delete_scanner(
+async def delete_scanner(
     scanner_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: user_model.User = Depends(get_current_user) # <--- PROTEGIDO
 ):
     """Deletar um scanner (Requer Login)"""
     try:
-        db_scanner = db.query(scanner_model.Scanner).filter(scanner_model.Scanner.id == scanner_id).first()
+        db_scanner = await db.get(scanner_model.Scanner, scanner_id)
 
         # ALTERAÇÃO AQUI:
         # Se não encontrar o scanner, assumimos que ele já foi deletado (provavelmente pelo duplo clique)
@@ -155,37 +486,41 @@ def delete_scanner(
         if not db_scanner:
             return {"message": "Scanner deletado (ou não existia)"}
 
-        db.delete(db_scanner)
-        db.commit()
+        await db.delete(db_scanner)
+        version = await catalog_version.bump(db)
+        await db.commit()
+        catalog_changed(version, deleted_id=scanner_id)
         return {"message": "Scanner deletado com sucesso"}
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Erro ao deletar scanner: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao deletar scanner: {str(e)}")
 
 @router.post("/upload")
 async def upload_image(
+    request: Request,
     file: UploadFile = File(...),
     current_user: user_model.User = Depends(get_current_user) # <--- PROTEGIDO
 ):
     """
-    Faz upload de uma imagem convertendo para Base64.
-    Retorna a string Base64 pronta para ser salva no banco.
+    Faz upload de uma imagem para o armazenamento endereçado por conteúdo (SHA-256).
+    O arquivo é gravado em blocos, e imagens repetidas são armazenadas uma única vez.
+    Retorna a URL curta pronta para ser salva no banco.
     """
     try:
-        # Lê o arquivo em memória
-        contents = await file.read()
-
-        # Converte para Base64
-        encoded_string = base64.b64encode(contents).decode("utf-8")
-
-        # Cria o Data URI (ex: data:image/jpeg;base64,...)
-        base64_url = f"data:{file.content_type};base64,{encoded_string}"
-
-        # Retorna com a chave "url" para manter compatibilidade com o frontend
-        return {"url": base64_url}
-
+        image_hash = await image_store.save_upload(file)
+    except image_store.ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except image_store.InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except image_store.ImageStoreUnavailableError as e:
+        print(f"Erro no upload: {str(e)}")
+        raise HTTPException(status_code=503, detail="Upload de imagens indisponível: armazenamento não configurado")
     except Exception as e:
-        print(f"Erro no upload (Base64): {str(e)}")
+        print(f"Erro no upload: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao processar imagem: {str(e)}")
+
+    # Retorna com a chave "url" para manter compatibilidade com o frontend
+    base_url = image_store.PUBLIC_API_URL or str(request.base_url)
+    return {"url": image_store.image_url(image_hash, base_url)}
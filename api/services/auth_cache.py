@@ -0,0 +1,84 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Por quanto tempo um token já validado dispensa decodificar o JWT e consultar o usuário
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+
+
+class Principal:
+    """Dados mínimos do usuário autenticado guardados no cache"""
+
+    __slots__ = ("user_id", "email", "token_exp", "auth_version", "expires_at")
+
+    def __init__(self, user_id: int, email: str, token_exp: float, auth_version: str, expires_at: float):
+        self.user_id = user_id
+        self.email = email
+        self.token_exp = token_exp
+        self.auth_version = auth_version
+        self.expires_at = expires_at
+
+
+class PrincipalCache:
+    """
+    Cache LRU de tokens já validados, indexado pelo hash do token (o token em si não fica na memória).
+    A chave também depende da SECRET_KEY, então trocar a chave invalida tudo. Cada entrada guarda
+    a versão de autenticação da época: quando ela muda (usuário apagado/alterado), a entrada é ignorada.
+    """
+
+    def __init__(self, secret_key: str, ttl: float = PRINCIPAL_CACHE_TTL, max_entries: int = PRINCIPAL_CACHE_SIZE):
+        self._secret_fingerprint = hashlib.sha256(secret_key.encode()).hexdigest()[:16]
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, token: str) -> str:
+        return hashlib.sha256(f"{self._secret_fingerprint}:{token}".encode()).hexdigest()
+
+    def get(self, key: str, auth_version: str) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            principal = self._entries.get(key)
+            valid = (
+                principal is not None
+                and principal.expires_at > now
+                and principal.token_exp > time.time()
+                and principal.auth_version == auth_version
+            )
+            if valid:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return principal
+            if principal is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, user_id: int, email: str, token_exp: float, auth_version: str):
+        principal = Principal(user_id, email, token_exp, auth_version, time.monotonic() + self.ttl)
+        with self._lock:
+            self._entries[key] = principal
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
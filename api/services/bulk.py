@@ -0,0 +1,300 @@
+import csv
+import io
+import json
+import os
+from decimal import Decimal, InvalidOperation
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+
+import models.scanner as scanner_model
+from services import catalog_version
+
+# Linhas gravadas por transação na importação (um executemany de INSERT e um de UPDATE por lote)
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+# Linhas lidas por consulta na exportação
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+# Quantos erros por linha entram no relatório (o total continua sendo contado)
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = ("ndjson", "csv")
+
+FIELDS = (
+    "id", "model", "brand", "item_condition", "original_price",
+    "sale_price", "image_url", "purchase_link", "in_stock",
+)
+EXPORT_FIELDS = FIELDS + ("created_date",)
+REQUIRED_FOR_INSERT = ("model", "brand", "item_condition", "sale_price")
+# Colunas de texto NOT NULL: nulo ou vazio derrubaria o UPDATE do lote inteiro
+REQUIRED_TEXT = ("model", "brand", "item_condition")
+
+_TEXT_LIMITS = {"model": 255, "brand": 50, "item_condition": 50, "image_url": None, "purchase_link": None}
+_TRUE = {"true", "1", "sim", "s", "yes", "y"}
+_FALSE = {"false", "0", "nao", "não", "n", "no"}
+
+
+class ImportReport:
+    """Resultado da importação, com os erros identificados pelo número da linha"""
+
+    def __init__(self, max_errors: int = MAX_REPORTED_ERRORS):
+        self.max_errors = max_errors
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line: int, error: str, scanner_id: Optional[int] = None):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "id": scanner_id, "error": error})
+
+    def record(self, written: List[Tuple[int, dict, str]]):
+        """Contabiliza as linhas de um lote confirmado"""
+        for _, _, action in written:
+            if action == "insert":
+                self.inserted += 1
+            else:
+                self.updated += 1
+
+    def fail(self, written: List[Tuple[int, dict, str]]):
+        """
+        O lote inteiro voltou atrás (rollback): todas as suas linhas contam como erro.
+        A mensagem é fixa; o erro do banco (com o SQL e os parâmetros) fica só no log.
+        """
+        for line, row, _ in written:
+            self.add_error(line, "Lote não gravado: erro ao gravar no banco de dados", row.get("id"))
+
+    def to_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def format_from_content_type(content_type: Optional[str]) -> str:
+    if content_type and "csv" in content_type:
+        return "csv"
+    return "ndjson"
+
+
+# --- Leitura ---
+
+async def iter_lines(chunks: AsyncIterable[bytes]):
+    """Quebra um corpo recebido em blocos em linhas (número da linha, texto), sem juntar tudo na memória"""
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, _decode(line, line_no)
+    if buffer.strip():
+        yield line_no + 1, _decode(buffer, line_no + 1)
+
+
+def iter_file_lines(f):
+    """Equivalente síncrono de iter_lines para arquivos abertos em modo binário"""
+    for line_no, line in enumerate(f, start=1):
+        yield line_no, _decode(line.rstrip(b"\n"), line_no)
+
+
+def _decode(line: bytes, line_no: int) -> str:
+    text = line.decode("utf-8", errors="replace").rstrip("\r")
+    if line_no == 1:
+        text = text.lstrip("﻿")  # BOM de planilhas exportadas no Windows
+    return text
+
+
+class RecordParser:
+    """
+    Converte cada linha em um dicionário. No CSV a primeira linha é o cabeçalho
+    e cada registro deve ocupar uma única linha.
+    """
+
+    def __init__(self, fmt: str):
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato inválido: {fmt}. Use {' ou '.join(FORMATS)}")
+        self.fmt = fmt
+        self.header: Optional[List[str]] = None
+
+    def parse(self, line: str) -> Optional[dict]:
+        """Retorna None para linhas vazias e para o cabeçalho; ValueError se a linha for inválida"""
+        if not line.strip():
+            return None
+
+        if self.fmt == "ndjson":
+            try:
+                raw = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"JSON inválido: {e.msg}")
+            if not isinstance(raw, dict):
+                raise ValueError("Cada linha deve ser um objeto JSON")
+            return raw
+
+        values = next(csv.reader([line]))
+        if self.header is None:
+            header = [name.strip().lower() for name in values]
+            unknown = [name for name in header if name not in EXPORT_FIELDS]
+            if unknown:
+                raise ValueError(f"Colunas desconhecidas no cabeçalho: {', '.join(unknown)}")
+            self.header = header
+            return None
+        if len(values) != len(self.header):
+            raise ValueError(f"Esperadas {len(self.header)} colunas, encontradas {len(values)}")
+        # Células vazias no CSV significam "não informado"
+        return {name: value for name, value in zip(self.header, values) if value != ""}
+
+
+def _parse_price(name: str, value) -> Decimal:
+    try:
+        price = Decimal(str(value).replace(",", ".")) if isinstance(value, str) else Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"{name} inválido: {value}")
+    if not price.is_finite() or price < 0:
+        raise ValueError(f"{name} inválido: {value}")
+    return price.quantize(Decimal("0.01"))
+
+
+def _parse_bool(name: str, value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"{name} inválido: {value}")
+
+
+def normalize_row(raw: dict) -> dict:
+    """
+    Valida e converte os campos de uma linha. Só os campos informados entram no resultado:
+    numa atualização (id existente) os demais ficam como estão.
+    """
+    row = {}
+    for name, value in raw.items():
+        if name == "created_date":
+            continue  # Gerado pelo banco; presente apenas para aceitar de volta o arquivo exportado
+        if name not in FIELDS:
+            raise ValueError(f"Campo desconhecido: {name}")
+        if name == "id":
+            try:
+                row["id"] = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"id inválido: {value}")
+            if row["id"] <= 0:
+                raise ValueError(f"id inválido: {value}")
+        elif name in ("original_price", "sale_price"):
+            row[name] = _parse_price(name, value)
+        elif name == "in_stock":
+            row[name] = _parse_bool(name, value)
+        else:
+            if value is None:
+                if name in REQUIRED_TEXT:
+                    raise ValueError(f"{name} não pode ser vazio")
+                row[name] = None
+                continue
+            text = str(value).strip()
+            if not text and name in REQUIRED_TEXT:
+                raise ValueError(f"{name} não pode ser vazio")
+            limit = _TEXT_LIMITS[name]
+            if limit and len(text) > limit:
+                raise ValueError(f"{name} maior que {limit} caracteres")
+            row[name] = text
+    return row
+
+
+# --- Escrita ---
+
+def write_batch(session, batch: List[Tuple[int, dict]], report: ImportReport, written: list):
+    """
+    Grava um lote numa única transação (sem commit): linhas com id existente viram UPDATE,
+    as demais viram INSERT, cada grupo num único executemany. Funciona com Session síncrona
+    (script de linha de comando) e via AsyncSession.run_sync (API).
+    As linhas aceitas são acrescentadas em written e as recusadas vão direto para o relatório.
+    Retorna a nova versão do catálogo, ou None se nada foi gravado.
+    """
+    Scanner = scanner_model.Scanner
+    ids = [row["id"] for _, row in batch if "id" in row]
+    existing = set()
+    if ids:
+        existing = set(session.scalars(select(Scanner.id).where(Scanner.id.in_(ids))).all())
+
+    inserts, updates = [], []
+    new_ids = set()
+    for line, row in batch:
+        scanner_id = row.get("id")
+        if scanner_id in existing:
+            if len(row) == 1:
+                report.add_error(line, "Nenhum campo para atualizar", scanner_id)
+                continue
+            updates.append(row)
+            written.append((line, row, "update"))
+            continue
+
+        missing = [name for name in REQUIRED_FOR_INSERT if row.get(name) is None]
+        if missing:
+            report.add_error(line, f"Campos obrigatórios ausentes: {', '.join(missing)}", scanner_id)
+            continue
+        if scanner_id is not None:
+            if scanner_id in new_ids:
+                report.add_error(line, "id repetido no mesmo lote", scanner_id)
+                continue
+            new_ids.add(scanner_id)
+        row.setdefault("original_price", Decimal("0"))
+        row.setdefault("in_stock", True)
+        inserts.append(row)
+        written.append((line, row, "insert"))
+
+    if not written:
+        return None
+
+    if inserts:
+        session.execute(insert(Scanner), inserts)
+    if updates:
+        session.execute(update(Scanner), updates)
+    return catalog_version.bump_sync(session)
+
+
+# --- Exportação ---
+
+def export_query(last_id: int, batch_size: int = EXPORT_BATCH_SIZE):
+    Scanner = scanner_model.Scanner
+    columns = [getattr(Scanner, name) for name in EXPORT_FIELDS]
+    return select(*columns).where(Scanner.id > last_id).order_by(Scanner.id).limit(batch_size)
+
+
+def _export_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def format_header(fmt: str) -> str:
+    if fmt != "csv":
+        return ""
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerow(EXPORT_FIELDS)
+    return out.getvalue()
+
+
+def format_rows(rows: Iterable, fmt: str) -> str:
+    """Converte um lote de linhas do banco no texto do arquivo exportado"""
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        for row in rows:
+            writer.writerow(["" if value is None else _export_value(value) for value in row])
+        return out.getvalue()
+
+    lines = []
+    for row in rows:
+        record: Dict[str, object] = {name: _export_value(value) for name, value in zip(EXPORT_FIELDS, row)}
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from services import catalog_version
+
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "256"))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+
+
+# Parâmetros em que maiúsculas não mudam o resultado. Os demais (ex: cursor em base64,
+# brand numa collation que diferencia maiúsculas) entram na chave exatamente como vieram.
+CASE_INSENSITIVE_PARAMS = frozenset({"search", "sort"})
+
+
+def make_key(route: str, **params) -> tuple:
+    """Chave normalizada: parâmetros vazios não contam e a ordem não importa"""
+    normalized = []
+    for name, value in sorted(params.items()):
+        if value is None or value == "":
+            continue
+        if isinstance(value, str) and name in CASE_INSENSITIVE_PARAMS:
+            value = value.strip().lower()
+        normalized.append((name, value))
+    return (route, tuple(normalized))
+
+
+class CatalogCache:
+    """
+    Cache LRU com TTL na frente das consultas do catálogo.
+    - as entradas ficam associadas à versão do catálogo: mudou a versão, não são mais usadas
+    - single-flight: várias requisições com a mesma chave fazem uma única consulta ao banco
+    """
+
+    def __init__(self, max_entries: int = CATALOG_CACHE_SIZE, ttl: float = CATALOG_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Acessados só de dentro do event loop (sem await entre ler e escrever), então não precisam de lock
+        self._entries = OrderedDict()  # (versão, chave) -> (expira_em, valor)
+        self._inflight = {}            # (versão, chave) -> asyncio.Future
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0  # Requisições que esperaram a consulta de outra
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        full_key = (await catalog_version.current(), key)
+
+        entry = self._entries.get(full_key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(full_key)
+            self.hits += 1
+            return entry[1]
+
+        future = self._inflight.get(full_key)
+        if future is not None:
+            self.coalesced += 1
+            # shield: se esta requisição for cancelada, a consulta das outras continua
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            self._inflight.pop(full_key, None)
+            future.cancel()
+            raise
+        except Exception as e:
+            self._inflight.pop(full_key, None)
+            future.set_exception(e)
+            # Evita o aviso de "exception was never retrieved" quando ninguém estava esperando
+            future.exception()
+            raise
+
+        self._inflight.pop(full_key, None)
+        self._entries[full_key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(full_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "catalog_version": catalog_version.known(),
+        }
+
+
+catalog_cache = CatalogCache()
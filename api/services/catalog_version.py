@@ -0,0 +1,14 @@
+from services.shared_version import SharedVersion
+
+# Linha da tabela cache_versions que representa o catálogo de scanners.
+# Incrementada a cada escrita; base dos ETags e do cache do catálogo.
+CATALOG = "catalog"
+
+_catalog = SharedVersion(CATALOG)
+
+subscribe = _catalog.subscribe
+observe = _catalog.observe
+known = _catalog.known
+current = _catalog.current
+bump = _catalog.bump
+bump_sync = _catalog.bump_sync
@@ -0,0 +1,163 @@
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele, só gzip
+    brotli = None
+
+# Tipos que valem a pena comprimir (imagens já vêm comprimidas)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """ETag da variante comprimida: o conteúdo muda com a codificação, então o ETag forte também muda"""
+    if etag and etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+class _Gzip:
+    def __init__(self, level):
+        # wbits=31 gera o formato gzip (cabeçalho + CRC)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Comprime respostas com brotli (se o cliente aceitar e o pacote estiver instalado) ou gzip.
+    Respostas menores que minimum_size saem sem compressão; respostas em streaming
+    são comprimidas bloco a bloco.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        accept = request_headers.get("accept-encoding", "")
+        if brotli is not None and "br" in accept:
+            encoding = "br"
+        elif "gzip" in accept:
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send, request_headers.get("if-none-match", ""))
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware, encoding, send, if_none_match: str = ""):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.if_none_match = if_none_match
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _new_compressor(self):
+        if self.encoding == "br":
+            return _Brotli(self.middleware.brotli_quality)
+        return _Gzip(self.middleware.gzip_level)
+
+    def _should_compress(self, headers):
+        if self.start_message["status"] != 200 or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _set_encoding_headers(self, headers):
+        headers["Content-Encoding"] = self.encoding
+        if "accept-encoding" not in headers.get("vary", "").lower():
+            headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag:
+            headers["ETag"] = variant_etag(etag, self.encoding)
+
+    def _set_not_modified_etag(self, headers):
+        """
+        O 304 leva o ETag da variante que o cliente validou: se ele mandou o ETag da versão
+        comprimida nesta codificação, devolve o mesmo (o da rota vem sem o sufixo)
+        """
+        etag = headers.get("etag")
+        if not etag:
+            return
+        compressed = variant_etag(etag, self.encoding)
+        sent = {tag.strip().removeprefix("W/") for tag in self.if_none_match.split(",")}
+        if compressed in sent:
+            headers["ETag"] = compressed
+            if "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            if message["status"] == 304:
+                self.passthrough = True
+                self._set_not_modified_etag(MutableHeaders(raw=message["headers"]))
+                await self.send(message)
+                return
+            self.start_message = message
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if self.compressor is not None:
+            # Continuação de uma resposta em streaming
+            body = self.compressor.compress(message.get("body", b""))
+            more_body = message.get("more_body", False)
+            if not more_body:
+                body += self.compressor.finish()
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        # Primeiro bloco do corpo: decide se comprime
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self._should_compress(headers) or (not more_body and len(body) < self.middleware.minimum_size):
+            self.passthrough = True
+            await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        self.compressor = self._new_compressor()
+        self._set_encoding_headers(headers)
+        compressed = self.compressor.compress(body)
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            compressed += self.compressor.finish()
+            headers["Content-Length"] = str(len(compressed))
+
+        await self.send(self.start_message)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
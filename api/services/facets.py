@@ -0,0 +1,174 @@
+import asyncio
+import os
+from decimal import Decimal
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy import case, func, literal, literal_column, select, union_all
+
+import models.scanner as scanner_model
+
+# Limites das faixas de preço do histograma (R$). Com "500,1000" as faixas são
+# [0, 500), [500, 1000) e [1000, ∞). Pode ser trocado por requisição com price_buckets=...
+FACET_PRICE_BUCKETS = os.getenv("FACET_PRICE_BUCKETS", "500,1000,2000,5000")
+MAX_PRICE_EDGES = 20
+# Espera (segundos) antes de recalcular as variantes depois de uma escrita: uma rajada de
+# escritas nesse intervalo custa um recálculo só
+FACET_REFRESH_DELAY = float(os.getenv("FACET_REFRESH_DELAY", "1.0"))
+
+
+def parse_edges(value: Optional[str]) -> Tuple[Decimal, ...]:
+    """Converte "500,1000,2000" em limites crescentes; ValueError se o formato for inválido"""
+    if not value:
+        return ()
+    try:
+        edges = tuple(Decimal(part.strip()) for part in value.split(",") if part.strip())
+    except ArithmeticError:
+        raise ValueError(f"Faixas de preço inválidas: {value}")
+    if len(edges) > MAX_PRICE_EDGES:
+        raise ValueError(f"Máximo de {MAX_PRICE_EDGES} limites de faixa de preço")
+    # NaN e infinito primeiro: comparar Decimal('NaN') com <= levanta InvalidOperation
+    if not all(edge.is_finite() for edge in edges):
+        raise ValueError(f"Faixas de preço inválidas: {value}")
+    if any(edge <= 0 for edge in edges) or list(edges) != sorted(set(edges)):
+        raise ValueError("Faixas de preço devem ser positivas e crescentes")
+    return edges
+
+
+DEFAULT_PRICE_EDGES = parse_edges(FACET_PRICE_BUCKETS)
+
+
+def _bucket_expression(edges):
+    """Índice da faixa de preço de cada linha (0 .. len(edges)), já como texto"""
+    Scanner = scanner_model.Scanner
+    if not edges:
+        return literal_column("'0'")
+    # Limites e índices vão escritos no SQL (já validados como números) para que a expressão
+    # do SELECT e a do GROUP BY sejam idênticas (exigência do ONLY_FULL_GROUP_BY do MySQL)
+    whens = [
+        (Scanner.sale_price < literal_column(str(edge)), literal_column(f"'{index}'"))
+        for index, edge in enumerate(edges)
+    ]
+    return case(*whens, else_=literal_column(f"'{len(edges)}'"))
+
+
+def facet_query(apply: Callable, edges):
+    """
+    Uma única consulta (UNION ALL de três GROUP BY) com as contagens por marca, por condição
+    e por faixa de preço. apply(query, exclude) aplica os filtros atuais; cada faceta ignora
+    o próprio filtro (ex: as contagens por marca não filtram pela marca escolhida).
+    """
+    Scanner = scanner_model.Scanner
+    bucket = _bucket_expression(edges)
+
+    brands = apply(
+        select(literal("brand").label("facet"), Scanner.brand.label("value"), func.count().label("total")),
+        "brand",
+    ).group_by(Scanner.brand)
+
+    conditions = apply(
+        select(literal("condition").label("facet"), Scanner.item_condition.label("value"), func.count().label("total")),
+        None,
+    ).group_by(Scanner.item_condition)
+
+    prices = apply(
+        select(literal("price").label("facet"), bucket.label("value"), func.count().label("total")),
+        "price",
+    ).group_by(bucket)
+
+    return union_all(brands, conditions, prices)
+
+
+def _price_histogram(edges, counts: dict) -> List[dict]:
+    histogram = []
+    lower = Decimal("0")
+    for index in range(len(edges) + 1):
+        upper = edges[index] if index < len(edges) else None
+        histogram.append({
+            "min": float(lower),
+            "max": float(upper) if upper is not None else None,
+            "count": counts.get(str(index), 0),
+        })
+        lower = upper
+    return histogram
+
+
+async def compute(db, apply: Callable, edges) -> dict:
+    """Executa a consulta das facetas e monta a resposta"""
+    rows = (await db.execute(facet_query(apply, edges))).all()
+
+    grouped = {"brand": {}, "condition": {}, "price": {}}
+    for facet, value, total in rows:
+        if value is not None:
+            grouped[facet][value] = total
+
+    def ranked(counts):
+        return [{"value": value, "count": count} for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))]
+
+    return {
+        # Todos os filtros valem para as condições, então a soma delas é o total filtrado
+        "total": sum(grouped["condition"].values()),
+        "brands": ranked(grouped["brand"]),
+        "conditions": ranked(grouped["condition"]),
+        "price_histogram": _price_histogram(edges, grouped["price"]),
+    }
+
+
+class FacetSnapshot:
+    """
+    Facetas de uma variante sem filtros de busca, marca ou preço (o painel na primeira visita),
+    calculadas uma vez por versão do catálogo. Depois de cada escrita o novo resultado é
+    recalculado em segundo plano.
+    """
+
+    def __init__(self):
+        self._version: Optional[str] = None
+        self._value: Optional[dict] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, version: str, load: Callable[[], Awaitable[dict]]) -> dict:
+        if self._version == version:
+            return self._value
+        async with self._lock:
+            if self._version != version:
+                value = await load()
+                self._version, self._value = version, value
+            return self._value
+
+
+# Variantes pré-calculadas, por valor de in_stock: sem filtro nenhum e só os em estoque
+# (o que a vitrine envia)
+snapshots = {None: FacetSnapshot(), True: FacetSnapshot()}
+
+_tasks = set()  # Referência às tarefas agendadas até terminarem
+_pending = False  # Já há um recálculo esperando: as próximas escritas entram nele
+
+
+def schedule(refresh: Callable[[], Awaitable]):
+    """
+    Agenda refresh() no event loop atual, FACET_REFRESH_DELAY segundos depois; enquanto ele
+    não começa, novos pedidos não agendam outro. Sem loop (ex: scripts), fica para a próxima leitura.
+    """
+    global _pending
+    if _pending:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _pending = True
+    task = loop.create_task(_run(refresh))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _run(refresh):
+    global _pending
+    try:
+        await asyncio.sleep(FACET_REFRESH_DELAY)
+    finally:
+        # Libera antes de recalcular: uma escrita durante o recálculo agenda o próximo
+        _pending = False
+    try:
+        await refresh()
+    except Exception as e:
+        print(f"Erro ao recalcular facetas: {str(e)}")
@@ -0,0 +1,53 @@
+import hashlib
+import os
+from fastapi.responses import Response
+from services import catalog_version
+from services.serialization import FastJSONResponse
+
+# Cache HTTP das rotas públicas de leitura do catálogo (navegador e CDN)
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "60"))
+CATALOG_STALE_WHILE_REVALIDATE = int(os.getenv("CATALOG_STALE_WHILE_REVALIDATE", "600"))
+
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_MAX_AGE}, stale-while-revalidate={CATALOG_STALE_WHILE_REVALIDATE}"
+
+# Sufixos que o CompressionMiddleware acrescenta ao ETag de respostas comprimidas
+_ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+async def catalog_etag(request) -> str:
+    """ETag forte: versão do catálogo + rota + parâmetros normalizados (ordem não importa)"""
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    raw = f"{await catalog_version.current()}|{request.url.path}|{params}"
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def _strip_suffix(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in _ENCODING_SUFFIXES:
+        if tag.endswith(suffix + '"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+
+def is_not_modified(request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(_strip_suffix(tag) == etag for tag in if_none_match.split(","))
+
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def cached_json(content, etag: str) -> FastJSONResponse:
+    """content pode ser o JSON já codificado (bytes, como a listagem guarda no cache) ou tipos JSON"""
+    return FastJSONResponse(content=content, headers=cache_headers(etag))
@@ -0,0 +1,198 @@
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+
+load_dotenv()
+
+# Diretório onde as imagens ficam salvas, endereçadas pelo SHA-256 do conteúdo.
+# Na Vercel o pacote da função é somente leitura e /tmp some com a instância: sem um
+# IMAGE_STORE_DIR apontando para um volume persistente, o upload responde 503 (o resto da
+# API segue funcionando).
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads", "images"))
+
+# URL pública da API (ex: https://api.dal.com.br). Usada para montar links absolutos
+# quando não há uma requisição disponível (ex: no script de migração).
+PUBLIC_API_URL = os.getenv("PUBLIC_API_URL", "").rstrip("/")
+
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))  # 10 MB
+CHUNK_SIZE = 1024 * 1024  # Lê/grava em blocos de 1 MB
+
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Assinaturas (magic bytes) dos formatos aceitos
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+class ImageTooLargeError(Exception):
+    pass
+
+
+class InvalidImageError(Exception):
+    pass
+
+
+class ImageStoreUnavailableError(Exception):
+    """Não há onde gravar imagens (diretório não configurado ou somente leitura)"""
+    pass
+
+
+def sniff_content_type(header: bytes) -> Optional[str]:
+    """Descobre o tipo da imagem pelos primeiros bytes do arquivo"""
+    for signature, content_type in _SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _configuration_problem() -> Optional[str]:
+    if os.getenv("VERCEL") and not os.getenv("IMAGE_STORE_DIR"):
+        return (
+            "IMAGE_STORE_DIR não configurado: na Vercel o diretório padrão é somente leitura "
+            "e não persiste entre instâncias"
+        )
+    return None
+
+
+def unavailable_reason() -> Optional[str]:
+    """Por que não dá para gravar imagens agora, ou None se o armazenamento está utilizável"""
+    problem = _configuration_problem()
+    if problem:
+        return problem
+    try:
+        os.makedirs(IMAGE_STORE_DIR, exist_ok=True)
+        with tempfile.TemporaryFile(dir=IMAGE_STORE_DIR, prefix=".check-"):
+            pass
+    except OSError as e:
+        return f"IMAGE_STORE_DIR ({IMAGE_STORE_DIR}) não é gravável: {str(e)}"
+    return None
+
+
+def is_valid_hash(image_hash: str) -> bool:
+    return bool(HASH_PATTERN.match(image_hash))
+
+
+def path_for(image_hash: str) -> str:
+    # Separa em subpastas pelos 2 primeiros caracteres para não lotar um único diretório
+    return os.path.join(IMAGE_STORE_DIR, image_hash[:2], image_hash)
+
+
+def image_url(image_hash: str, base_url: Optional[str] = None) -> str:
+    base = (base_url or PUBLIC_API_URL).rstrip("/")
+    return f"{base}/api/images/{image_hash}"
+
+
+class _PendingImage:
+    """Arquivo temporário que vai sendo escrito e hasheado bloco a bloco"""
+
+    def __init__(self):
+        problem = _configuration_problem()
+        if problem:
+            raise ImageStoreUnavailableError(problem)
+        try:
+            os.makedirs(IMAGE_STORE_DIR, exist_ok=True)
+            fd, self.tmp_path = tempfile.mkstemp(dir=IMAGE_STORE_DIR, prefix=".upload-")
+        except OSError as e:
+            raise ImageStoreUnavailableError(f"IMAGE_STORE_DIR ({IMAGE_STORE_DIR}) não é gravável: {str(e)}")
+        self.file = os.fdopen(fd, "wb")
+        self.sha = hashlib.sha256()
+        self.size = 0
+        self.header = b""
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > MAX_IMAGE_BYTES:
+            raise ImageTooLargeError(f"Imagem maior que o limite de {MAX_IMAGE_BYTES} bytes")
+        if len(self.header) < 16:
+            self.header += chunk[:16 - len(self.header)]
+        self.sha.update(chunk)
+        self.file.write(chunk)
+
+    def commit(self) -> str:
+        """Move o temporário para o endereço final. Se já existir, o duplicado é descartado."""
+        self.file.close()
+        if sniff_content_type(self.header) is None:
+            raise InvalidImageError("Formato de imagem não suportado")
+
+        image_hash = self.sha.hexdigest()
+        final_path = path_for(image_hash)
+        if os.path.exists(final_path):
+            os.remove(self.tmp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(self.tmp_path, final_path)
+        return image_hash
+
+    def discard(self):
+        if not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+async def save_upload(upload) -> str:
+    """Salva um UploadFile lendo em blocos (sem carregar tudo na memória) e retorna o hash"""
+    # Escrita em disco e hash rodam em thread para não travar o event loop
+    pending = await run_in_threadpool(_PendingImage)
+    try:
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            await run_in_threadpool(pending.write, chunk)
+        return await run_in_threadpool(pending.commit)
+    except Exception:
+        await run_in_threadpool(pending.discard)
+        raise
+
+
+def save_bytes(data: bytes) -> str:
+    """Salva um conteúdo já em memória (usado na migração dos data URIs antigos)"""
+    pending = _PendingImage()
+    try:
+        for start in range(0, len(data), CHUNK_SIZE):
+            pending.write(data[start:start + CHUNK_SIZE])
+        return pending.commit()
+    except Exception:
+        pending.discard()
+        raise
+
+
+def open_image(image_hash: str):
+    """Retorna (caminho, tamanho, content_type) ou None se a imagem não existir"""
+    if not is_valid_hash(image_hash):
+        return None
+    path = path_for(image_hash)
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            content_type = sniff_content_type(f.read(16)) or "application/octet-stream"
+    except FileNotFoundError:
+        return None
+    return path, size, content_type
+
+
+def iter_file(path: str, start: int = 0, end: Optional[int] = None):
+    """Itera sobre o arquivo em blocos, do byte start até end (inclusive)"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,163 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from starlette.datastructures import MutableHeaders
+
+from services import metrics
+
+# Log de consultas lentas (opcional): SLOW_QUERY_MS=200 registra toda consulta acima de 200 ms
+# com o SQL e os parâmetros. Vazio ou 0 desliga.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS") or 0)
+# Parâmetros longos (ex: imagens Base64 antigas) são cortados no log
+SLOW_QUERY_PARAM_CHARS = 200
+
+# Limites dos histogramas que não são de tempo
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+slow_query_logger = logging.getLogger("api.slow_query")
+
+
+class RequestStats:
+    """Contadores de uma requisição (consultas SQL e espera por conexão)"""
+
+    __slots__ = ("sql_count", "sql_seconds", "pool_wait_seconds")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+# A requisição em andamento. As consultas do motor assíncrono rodam em greenlets que
+# herdam o contexto da tarefa, então os eventos do SQLAlchemy enxergam este valor.
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+# --- Eventos do SQLAlchemy (valem para todos os motores, inclusive async_engine.sync_engine) ---
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_seconds += elapsed
+    metrics.observe("db_query_duration_seconds", elapsed)
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_query_logger.warning(
+            "Consulta lenta (%.1f ms): %s | parâmetros: %s",
+            elapsed * 1000, " ".join(statement.split()), _short_parameters(parameters),
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def _short_parameters(parameters) -> str:
+    text = repr(parameters)
+    if len(text) <= SLOW_QUERY_PARAM_CHARS * 4:
+        return text
+    return text[:SLOW_QUERY_PARAM_CHARS * 4] + f"... ({len(text)} caracteres)"
+
+
+# --- Pools que medem a espera por uma conexão livre ---
+
+class _TimedPoolMixin:
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            stats = _current.get()
+            if stats is not None:
+                stats.pool_wait_seconds += waited
+            metrics.observe("db_pool_wait_seconds", waited)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(_TimedPoolMixin, NullPool):
+    """Com NullPool a "espera" é o tempo de abrir a conexão"""
+
+
+# --- Middleware ---
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    # Usa o caminho declarado (ex: /api/scanners/{scanner_id}) para não criar uma série por id
+    return getattr(route, "path", None) or "unmatched"
+
+
+class InstrumentationMiddleware:
+    """
+    Mede cada requisição HTTP: latência por rota, consultas SQL (quantidade e tempo),
+    espera por conexão do pool e bytes enviados. Os números vão para services.metrics
+    (expostos em /metrics) e para o cabeçalho Server-Timing da resposta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = [500]
+        sent_bytes = [0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", self._server_timing(stats, time.perf_counter() - started))
+            elif message["type"] == "http.response.body":
+                sent_bytes[0] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            labels = {"method": scope["method"], "route": _route_label(scope), "status": str(status[0])}
+            route_labels = {"method": scope["method"], "route": labels["route"]}
+            metrics.increment("http_requests_total", labels)
+            metrics.observe("http_request_duration_seconds", elapsed, route_labels)
+            metrics.observe("http_response_size_bytes", sent_bytes[0], route_labels, buckets=SIZE_BUCKETS)
+            metrics.observe("db_queries_per_request", stats.sql_count, route_labels, buckets=QUERY_COUNT_BUCKETS)
+            metrics.observe("db_seconds_per_request", stats.sql_seconds, route_labels)
+
+    @staticmethod
+    def _server_timing(stats: RequestStats, elapsed: float) -> str:
+        return ", ".join((
+            f"app;dur={elapsed * 1000:.1f}",
+            f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.sql_count} queries"',
+            f"pool;dur={stats.pool_wait_seconds * 1000:.1f}",
+        ))
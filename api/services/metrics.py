@@ -0,0 +1,119 @@
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Limites (em segundos) dos histogramas de latência
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, tuple], float] = {}
+_histograms: Dict[Tuple[str, tuple], dict] = {}
+_bucket_config: Dict[str, tuple] = {}
+_hooks: List[Callable[[str, str, float, dict], None]] = []
+
+
+def _label_key(labels: Optional[dict]) -> tuple:
+    return tuple(sorted((labels or {}).items()))
+
+
+def add_hook(hook: Callable[[str, str, float, dict], None]):
+    """
+    Registra uma função chamada a cada métrica registrada, com (tipo, nome, valor, labels).
+    Útil para encaminhar as métricas para outro sistema (logs, StatsD, etc.).
+    """
+    _hooks.append(hook)
+
+
+def _call_hooks(kind: str, name: str, value: float, labels: Optional[dict]):
+    for hook in _hooks:
+        try:
+            hook(kind, name, value, labels or {})
+        except Exception as e:
+            print(f"Erro no hook de métricas: {str(e)}")
+
+
+def increment(name: str, labels: Optional[dict] = None, amount: float = 1):
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+    _call_hooks("counter", name, amount, labels)
+
+
+def observe(name: str, value: float, labels: Optional[dict] = None, buckets: tuple = DEFAULT_BUCKETS):
+    """Registra um valor num histograma (ex: latência em segundos)"""
+    key = (name, _label_key(labels))
+    with _lock:
+        bucket_limits = _bucket_config.setdefault(name, buckets)
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * len(bucket_limits), "sum": 0.0, "count": 0}
+        for index, limit in enumerate(bucket_limits):
+            if value <= limit:
+                histogram["buckets"][index] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+    _call_hooks("histogram", name, value, labels)
+
+
+def snapshot() -> dict:
+    """Cópia dos valores atuais: {"counters": {...}, "histograms": {...}}"""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "histograms": {
+                key: {**value, "buckets": list(value["buckets"]), "limits": _bucket_config[key[0]]}
+                for key, value in _histograms.items()
+            },
+        }
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    """Número sem perder precisão (:g corta em 6 dígitos e um contador acima de 1e6 "para")"""
+    if isinstance(value, int):
+        return str(value)
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _format_labels(labels: tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+def render_prometheus() -> str:
+    """Todas as métricas no formato texto do Prometheus (GET /metrics)"""
+    data = snapshot()
+    lines = []
+
+    counters = {}
+    for (name, labels), value in sorted(data["counters"].items()):
+        counters.setdefault(name, []).append((labels, value))
+    for name, series in counters.items():
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in series:
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    histograms = {}
+    for (name, labels), value in sorted(data["histograms"].items()):
+        histograms.setdefault(name, []).append((labels, value))
+    for name, series in histograms.items():
+        lines.append(f"# TYPE {name} histogram")
+        for labels, value in series:
+            # Os buckets já são cumulativos (cada valor conta em todos os limites >= ele)
+            for limit, count in zip(value["limits"], value["buckets"]):
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(limit)))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {value['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Awaitable, Callable, Hashable, Optional
+
+from sqlalchemy import and_, or_
+
+MAX_PAGE_SIZE = 100
+
+# Por quanto tempo o total aproximado (COUNT) de um filtro é reaproveitado
+APPROX_COUNT_TTL = float(os.getenv("APPROX_COUNT_TTL", "60"))
+
+
+class InvalidCursorError(Exception):
+    pass
+
+
+class SortSpec:
+    """Ordenação estável: coluna principal + id como desempate"""
+
+    def __init__(self, column, descending: bool, parse: Callable):
+        self.column = column
+        self.descending = descending
+        self.parse = parse  # Converte o valor salvo no cursor de volta para o tipo da coluna
+
+    def order_by(self, id_column):
+        if self.descending:
+            return self.column.desc(), id_column.desc()
+        return self.column.asc(), id_column.asc()
+
+    def seek(self, id_column, value, last_id):
+        """Filtro que continua a listagem depois de (value, last_id), sem OFFSET"""
+        if self.descending:
+            return or_(self.column < value, and_(self.column == value, id_column < last_id))
+        return or_(self.column > value, and_(self.column == value, id_column > last_id))
+
+
+def parse_datetime(value):
+    return datetime.fromisoformat(value)
+
+
+def parse_decimal(value):
+    # Decimal("abc") levanta InvalidOperation (não ValueError); NaN/Infinity quebrariam o filtro
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"Decimal inválido: {value}")
+    if not number.is_finite():
+        raise ValueError(f"Decimal inválido: {value}")
+    return number
+
+
+def _to_json(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(sort_name: str, value, last_id: int) -> str:
+    """Cursor opaco com a chave de ordenação do último item da página"""
+    raw = json.dumps([sort_name, _to_json(value), last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_name: str, sort: SortSpec):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        name, value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if name != sort_name or not isinstance(last_id, int):
+            raise InvalidCursorError("Cursor não corresponde à ordenação pedida")
+        return sort.parse(value), last_id
+    except InvalidCursorError:
+        raise
+    except (binascii.Error, ValueError, TypeError, InvalidOperation):
+        raise InvalidCursorError("Cursor inválido")
+
+
+def total_pages(total: Optional[int], limit: int) -> Optional[int]:
+    if total is None:
+        return None
+    return math.ceil(total / limit)
+
+
+class CountCache:
+    """Guarda o COUNT(*) de cada combinação de filtros por alguns segundos,
+    para que trocar de página ou rolar a lista não repita a contagem."""
+
+    def __init__(self, ttl: float = APPROX_COUNT_TTL, max_entries: int = 512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    async def get(self, key: Hashable, count: Callable[[], Awaitable[int]]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                return entry[0]
+
+        value = await count()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (value, now + self.ttl)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+count_cache = CountCache()
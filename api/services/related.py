@@ -0,0 +1,280 @@
+import asyncio
+import bisect
+import os
+import threading
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models.scanner as scanner_model
+
+# Quantos relacionados ficam guardados por produto (o máximo que a rota devolve)
+RELATED_SIZE = int(os.getenv("RELATED_SIZE", "8"))
+
+# Peso de cada critério na semelhança (soma 1.0)
+WEIGHTS = {"brand": 0.5, "condition": 0.2, "price": 0.3}
+# Diferença de preço (relativa ao maior dos dois) a partir da qual o critério de preço vale zero
+PRICE_TOLERANCE = 0.5
+_BRAND, _CONDITION, _PRICE = WEIGHTS["brand"], WEIGHTS["condition"], WEIGHTS["price"]
+
+# Atualizar uma linha na tabela pronta custa ~50x a parte dela numa montagem completa
+# (100k linhas: ~3 ms por atualização contra ~6,5 s a montagem): lotes acima de 1/50 do
+# catálogo saem mais baratos remontando
+INCREMENTAL_RATIO = 50
+
+# O que o índice guarda de cada scanner
+Item = namedtuple("Item", ["brand", "condition", "price", "in_stock"])
+
+
+def make_item(brand: Optional[str], condition: Optional[str], sale_price, in_stock) -> Item:
+    price = float(sale_price) if sale_price is not None else None
+    return Item((brand or "").strip().casefold(), (condition or "").strip().casefold(), price, bool(in_stock))
+
+
+def score(a: Item, b: Item) -> float:
+    """Semelhança entre dois scanners: mesma marca, mesma condição e preço de venda próximo"""
+    total = 0.0
+    if a.brand == b.brand:
+        total += _BRAND
+    if a.condition == b.condition:
+        total += _CONDITION
+    if a.price is not None and b.price is not None:
+        high = a.price if a.price > b.price else b.price
+        if high <= 0:
+            total += _PRICE
+        else:
+            closeness = 1 - abs(a.price - b.price) / (PRICE_TOLERANCE * high)
+            if closeness > 0:
+                total += _PRICE * closeness
+    return total
+
+
+def _group_keys(item: Item):
+    return (("pair", item.brand, item.condition), ("brand", item.brand), ("condition", item.condition), ("all",))
+
+
+# Maior nota que um candidato visto pela primeira vez em cada grupo pode ter (os de marca+condição
+# mais próximos já saíram do primeiro grupo): se o K-ésimo melhor já passa disso, o grupo é pulado
+GROUP_BOUNDS = (1.0, _BRAND + _PRICE, _CONDITION + _PRICE, _PRICE)
+
+
+class _NeighborTable:
+    """
+    Vizinhos pré-calculados de cada scanner. Os candidatos (só os em estoque e com preço)
+    ficam em listas ordenadas por preço, uma por grupo: marca+condição, marca, condição e todos.
+    Para um scanner, os K mais parecidos estão sempre entre os K vizinhos de preço abaixo e
+    acima dele em algum desses grupos, então basta pontuar essas janelas (busca binária) em vez
+    de comparar com o catálogo inteiro.
+    Só os candidatos têm a lista guardada: a janela é simétrica entre eles, o que permite saber
+    quem recalcular a cada escrita. Os demais (fora de estoque ou sem preço) são calculados na leitura.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.items: Dict[int, Item] = {}
+        self.groups: Dict[tuple, List[Tuple[float, int]]] = {}
+        self.neighbors: Dict[int, Tuple[int, ...]] = {}
+        self.referenced_by: Dict[int, set] = {}  # id -> ids que o têm como relacionado
+
+    # --- Montagem em lote ---
+
+    def build(self, rows: Iterable[Tuple[int, Item]]):
+        self.items = dict(rows)
+        # Uma ordenação só; cada grupo herda a ordem ao ser preenchido
+        for scanner_id, item in sorted(
+            ((i, item) for i, item in self.items.items() if self._is_candidate(item)),
+            key=lambda pair: (pair[1].price, pair[0]),
+        ):
+            for key in _group_keys(item):
+                self.groups.setdefault(key, []).append((item.price, scanner_id))
+        for scanner_id, item in self.items.items():
+            if self._is_candidate(item):
+                self._recompute(scanner_id)
+
+    # --- Manutenção incremental ---
+
+    def upsert(self, scanner_id: int, item: Item):
+        dirty = self.referenced_by.pop(scanner_id, set())
+        old = self.items.get(scanner_id)
+        if old is not None and self._is_candidate(old):
+            for key in _group_keys(old):
+                entries = self.groups[key]
+                del entries[bisect.bisect_left(entries, (old.price, scanner_id))]
+
+        self.items[scanner_id] = item
+        if self._is_candidate(item):
+            for key in _group_keys(item):
+                bisect.insort(self.groups.setdefault(key, []), (item.price, scanner_id))
+            # Quem tem este scanner numa janela de preço pode passar a tê-lo como relacionado
+            for key in _group_keys(item):
+                dirty.update(self._window(scanner_id, item, key))
+            dirty.add(scanner_id)
+        else:
+            self._forget(scanner_id)
+
+        for other_id in dirty:
+            self._recompute(other_id)
+
+    def delete(self, scanner_id: int):
+        item = self.items.pop(scanner_id, None)
+        if item is None:
+            return
+        if self._is_candidate(item):
+            for key in _group_keys(item):
+                entries = self.groups[key]
+                del entries[bisect.bisect_left(entries, (item.price, scanner_id))]
+        self._forget(scanner_id)
+        for other_id in self.referenced_by.pop(scanner_id, set()):
+            self._recompute(other_id)
+
+    def related(self, scanner_id: int) -> Optional[Tuple[int, ...]]:
+        found = self.neighbors.get(scanner_id)
+        if found is None and scanner_id in self.items:
+            found = self._top(scanner_id, self.items[scanner_id])
+        return found
+
+    # --- Cálculo ---
+
+    @staticmethod
+    def _is_candidate(item: Item) -> bool:
+        return item.in_stock and item.price is not None
+
+    def _window(self, scanner_id: int, item: Item, key) -> List[int]:
+        """Ids dos K vizinhos de preço abaixo e acima do item no grupo key"""
+        entries = self.groups.get(key)
+        if not entries:
+            return []
+        if item.price is None:
+            # Sem preço não há proximidade: usa os primeiros do grupo
+            return [i for _, i in entries[:self.size + 1]]
+        position = bisect.bisect_left(entries, (item.price, scanner_id))
+        return [i for _, i in entries[max(position - self.size, 0):position + self.size + 1]]
+
+    def _top(self, scanner_id: int, item: Item) -> Tuple[int, ...]:
+        items = self.items
+        size = self.size
+        scores = {}
+        for key, bound in zip(_group_keys(item), GROUP_BOUNDS):
+            if len(scores) >= size and sorted(scores.values())[-size] > bound:
+                continue
+            for other_id in self._window(scanner_id, item, key):
+                if other_id != scanner_id and other_id not in scores:
+                    scores[other_id] = score(item, items[other_id])
+        best = sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))[:size]
+        return tuple(other_id for other_id, _ in best)
+
+    def _recompute(self, scanner_id: int):
+        self._forget(scanner_id)
+        best = self._top(scanner_id, self.items[scanner_id])
+        self.neighbors[scanner_id] = best
+        for neighbor_id in best:
+            self.referenced_by.setdefault(neighbor_id, set()).add(scanner_id)
+
+    def _forget(self, scanner_id: int):
+        for neighbor_id in self.neighbors.pop(scanner_id, ()):
+            self.referenced_by.get(neighbor_id, set()).discard(scanner_id)
+
+
+class RelatedIndex:
+    """
+    Produtos relacionados de cada scanner, mantidos na memória do processo.
+    Montado em lote na primeira consulta (ou pelo /api/warmup) e atualizado a cada escrita;
+    a leitura é uma consulta a um dicionário. Quando precisa ser remontado por inteiro, a
+    montagem roda em segundo plano e as leituras seguem na tabela atual até a troca.
+    """
+
+    def __init__(self, size: int = RELATED_SIZE):
+        self.size = size
+        self._lock = threading.RLock()
+        self._warm_lock = asyncio.Lock()
+        self._table = _NeighborTable(size)
+        self._generation = 0  # Muda a cada escrita: detecta escritas durante uma montagem
+        self.ready = False  # Já existe uma tabela montada (mesmo que defasada) para responder
+        self.built = False  # A tabela está em dia com o catálogo
+        self._rebuild_task = None
+
+    async def warm(self, db):
+        Scanner = scanner_model.Scanner
+        generation = self._generation
+        result = await db.execute(
+            select(Scanner.id, Scanner.brand, Scanner.item_condition, Scanner.sale_price, Scanner.in_stock)
+        )
+        rows = [(row[0], make_item(*row[1:])) for row in result.all()]
+
+        def build():
+            table = _NeighborTable(self.size)
+            table.build(rows)
+            return table
+
+        # A montagem roda fora do event loop numa tabela nova, trocada de uma vez no fim
+        table = await asyncio.to_thread(build)
+        with self._lock:
+            self._table = table
+            self.ready = True
+            # Se houve escrita no meio, a tabela pode estar defasada: remonta na próxima leitura
+            self.built = self._generation == generation
+
+    async def ensure(self, db):
+        if not self.ready:
+            # Só espera a montagem quando ainda não há tabela nenhuma
+            async with self._warm_lock:
+                if not self.ready:
+                    await self.warm(db)
+        elif not self.built:
+            self._schedule_rebuild(db.bind)
+
+    def _schedule_rebuild(self, bind):
+        """Remonta em segundo plano, uma tarefa por vez; as leituras seguem na tabela atual"""
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.get_running_loop().create_task(self._rebuild(bind))
+
+    async def _rebuild(self, bind):
+        try:
+            async with AsyncSession(bind) as db:
+                await self.warm(db)
+        except Exception as e:
+            print(f"Erro ao remontar o índice de relacionados: {str(e)}")
+
+    def invalidate(self):
+        """Outra instância (ou uma importação) mudou o catálogo: remonta em segundo plano na próxima leitura"""
+        with self._lock:
+            self._generation += 1
+            self.built = False
+
+    def on_upsert(self, scanner_id: int, brand: str, condition: str, sale_price, in_stock: bool):
+        with self._lock:
+            self._generation += 1
+            # Mesmo defasada, a tabela atual continua respondendo até a troca: mantém a escrita nela
+            if self.ready:
+                self._table.upsert(scanner_id, make_item(brand, condition, sale_price, in_stock))
+
+    def on_upsert_many(self, rows: List[tuple]):
+        """
+        Atualiza várias linhas (id, brand, condition, sale_price, in_stock) de uma escrita em lote.
+        Pesado em lotes grandes: chame fora do event loop.
+        """
+        with self._lock:
+            if self.ready and len(rows) * INCREMENTAL_RATIO > len(self._table.items):
+                # Remontar sai mais barato: fica para o segundo plano na próxima leitura
+                self._generation += 1
+                self.built = False
+                return
+        for row in rows:
+            self.on_upsert(*row)
+
+    def on_delete(self, scanner_id: int):
+        with self._lock:
+            self._generation += 1
+            if self.ready:
+                self._table.delete(scanner_id)
+
+    def neighbors(self, scanner_id: int, limit: int) -> Optional[List[int]]:
+        """Ids dos relacionados, do mais para o menos parecido; None se o scanner não existe"""
+        with self._lock:
+            found = self._table.related(scanner_id)
+            return None if found is None else list(found[:limit])
+
+
+index = RelatedIndex()
@@ -0,0 +1,367 @@
+import asyncio
+import bisect
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict, namedtuple
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, case, false, or_, select
+from sqlalchemy.dialects.mysql import match as mysql_match
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models.scanner as scanner_model
+
+# Backend da busca: "memory" (índice invertido em memória), "fulltext" (MySQL FULLTEXT)
+# ou "like" (ILIKE '%termo%', o comportamento antigo)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "memory")
+
+# Limite de ids ranqueados que a busca em memória devolve para o SQL. Acima disso o filtro
+# vira um ILIKE pelos tokens encontrados (e o total passa a ser aproximado)
+MAX_RESULTS = 1000
+
+# Peso de cada campo no ranking: quem busca "zebra" quer primeiro os da marca Zebra
+FIELD_WEIGHTS = {"brand": 1.5, "model": 1.0}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_NON_WORD = re.compile(r"\W+")
+
+# Resultado de uma busca: filtro para o WHERE, expressão de relevância (ou None) e se o
+# filtro só aproxima o que o backend encontraria (o total deve ser informado como aproximado)
+SearchMatch = namedtuple("SearchMatch", ["clause", "relevance", "approximate"], defaults=(False,))
+
+
+def fold(value: str) -> str:
+    """Normaliza para comparação: sem acentos, minúsculas e só letras/números"""
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", without_accents.casefold()).strip()
+
+
+def tokenize(value: str) -> List[str]:
+    return fold(value).split()
+
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Distância de edição (com transposição de letras vizinhas), abandonando o cálculo quando passa de limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before_previous[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+class SearchBackend:
+    """Interface comum dos backends de busca usados pelo GET /api/scanners"""
+
+    name = ""
+
+    async def match(self, db, term: str) -> SearchMatch:
+        raise NotImplementedError
+
+    # Ganchos chamados pelas rotas de escrita (só o índice em memória precisa deles)
+    def on_upsert(self, scanner_id: int, model: str, brand: str):
+        pass
+
+    def on_delete(self, scanner_id: int):
+        pass
+
+    async def warm(self, db):
+        pass
+
+    def invalidate(self):
+        pass
+
+
+class LikeSearchBackend(SearchBackend):
+    """Comportamento antigo: ILIKE '%termo%' (não usa índice, varre a tabela)"""
+
+    name = "like"
+
+    async def match(self, db, term: str) -> SearchMatch:
+        Scanner = scanner_model.Scanner
+        search_filter = f"%{term}%"
+        clause = or_(Scanner.model.ilike(search_filter), Scanner.brand.ilike(search_filter))
+        return SearchMatch(clause, None)
+
+
+class FulltextSearchBackend(SearchBackend):
+    """MySQL FULLTEXT (índice ft_scanners_model_brand) em modo booleano com prefixo"""
+
+    name = "fulltext"
+
+    async def match(self, db, term: str) -> SearchMatch:
+        tokens = tokenize(term)
+        if not tokens:
+            return SearchMatch(false(), None)
+        # "+zebra +ds22*": todos os termos obrigatórios, o último como prefixo (busca enquanto digita)
+        boolean_query = " ".join(f"+{t}" for t in tokens[:-1]) + f" +{tokens[-1]}*"
+        Scanner = scanner_model.Scanner
+        relevance = mysql_match(Scanner.model, Scanner.brand, against=boolean_query.strip()).in_boolean_mode()
+        return SearchMatch(relevance > 0, relevance)
+
+
+class InMemorySearchIndex(SearchBackend):
+    """
+    Índice invertido sobre modelo e marca, mantido na memória do processo.
+    - ignora acentos e maiúsculas ("codigo" encontra "Código")
+    - o último termo vale como prefixo ("zeb" encontra "Zebra")
+    - tolera erros de digitação via trigramas + distância de edição ("zebar")
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._warm_lock = asyncio.Lock()
+        self._generation = 0  # Muda a cada escrita: detecta escritas durante uma montagem
+        self.ready = False  # Já existe um índice montado (mesmo que defasado) para responder buscas
+        self.built = False  # O índice está em dia com o catálogo
+        self._rebuild_task = None
+        self._clear()
+
+    def _clear(self):
+        self._docs = {}                       # id -> [(token, peso)]
+        self._postings = {}                   # token -> {id: peso}
+        self._vocabulary = []                 # tokens ordenados (para busca por prefixo)
+        self._trigrams = defaultdict(set)     # trigrama -> tokens
+        self._spellings = defaultdict(set)    # token -> palavras como estão no banco (com acentos e maiúsculas)
+
+    # --- Manutenção do índice ---
+
+    def rebuild(self, rows: Iterable[Tuple[int, str, str]]):
+        with self._lock:
+            self._clear()
+            for scanner_id, model, brand in rows:
+                self._add(scanner_id, model, brand)
+            self.ready = self.built = True
+
+    async def warm(self, db):
+        Scanner = scanner_model.Scanner
+        generation = self._generation
+        result = await db.execute(select(Scanner.id, Scanner.model, Scanner.brand))
+        rows = result.all()
+
+        def build():
+            fresh = InMemorySearchIndex()
+            fresh.rebuild(rows)
+            return fresh
+
+        # A montagem roda fora do event loop num índice novo, trocado de uma vez no fim
+        fresh = await asyncio.to_thread(build)
+        with self._lock:
+            self._docs, self._postings, self._vocabulary = fresh._docs, fresh._postings, fresh._vocabulary
+            self._trigrams, self._spellings = fresh._trigrams, fresh._spellings
+            self.ready = True
+            # Se houve escrita no meio, o índice pode estar defasado: remonta na próxima busca
+            self.built = self._generation == generation
+
+    def _schedule_rebuild(self, bind):
+        """Remonta em segundo plano, uma tarefa por vez; as buscas seguem no índice atual"""
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.get_running_loop().create_task(self._rebuild(bind))
+
+    async def _rebuild(self, bind):
+        try:
+            async with AsyncSession(bind) as db:
+                await self.warm(db)
+        except Exception as e:
+            print(f"Erro ao remontar o índice de busca: {str(e)}")
+
+    def invalidate(self):
+        """Outra instância (ou uma escrita em lote) mudou o catálogo: remonta em segundo plano na próxima busca"""
+        with self._lock:
+            self._generation += 1
+            self.built = False
+
+    def on_upsert(self, scanner_id: int, model: str, brand: str):
+        with self._lock:
+            self._generation += 1
+            if not self.ready:
+                return  # Será montado por completo na próxima busca
+            # Mesmo defasado, o índice atual continua respondendo até a troca: mantém a escrita nele
+            self._remove(scanner_id)
+            self._add(scanner_id, model, brand)
+
+    def on_delete(self, scanner_id: int):
+        with self._lock:
+            self._generation += 1
+            if self.ready:
+                self._remove(scanner_id)
+
+    def _add(self, scanner_id, model, brand):
+        weights = {}
+        for field, value in (("model", model), ("brand", brand)):
+            for token in tokenize(value):
+                weights[token] = max(weights.get(token, 0), FIELD_WEIGHTS[field])
+
+        for value in (model, brand):
+            # Grafia original: o ILIKE aplica a mesma conversão dos dois lados, mesmo fora do ASCII
+            for word in _NON_WORD.split(value or ""):
+                for token in tokenize(word):
+                    self._spellings[token].add(word)
+
+        self._docs[scanner_id] = list(weights.items())
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._postings[token] = {}
+                bisect.insort(self._vocabulary, token)
+                for gram in trigrams(token):
+                    self._trigrams[gram].add(token)
+            self._postings[token][scanner_id] = weight
+
+    def _remove(self, scanner_id):
+        for token, _ in self._docs.pop(scanner_id, ()):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(scanner_id, None)
+            if not posting:
+                del self._postings[token]
+                self._spellings.pop(token, None)
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+                for gram in trigrams(token):
+                    self._trigrams[gram].discard(token)
+                    if not self._trigrams[gram]:
+                        del self._trigrams[gram]
+
+    # --- Consulta ---
+
+    def _candidates(self, term: str, allow_prefix: bool):
+        """Tokens do vocabulário que casam com o termo, com a nota de cada um (0 a 1)"""
+        found = {}
+        if term in self._postings:
+            found[term] = 1.0
+
+        if allow_prefix:
+            position = bisect.bisect_left(self._vocabulary, term)
+            while position < len(self._vocabulary) and self._vocabulary[position].startswith(term):
+                token = self._vocabulary[position]
+                position += 1
+                if token != term:
+                    found[token] = max(found.get(token, 0), 0.5 + 0.4 * len(term) / len(token))
+
+        if len(term) >= 3:
+            limit = 1 if len(term) <= 5 else 2
+            grams = trigrams(term)
+            shared = defaultdict(int)
+            for gram in grams:
+                for token in self._trigrams.get(gram, ()):
+                    shared[token] += 1
+            for token, count in shared.items():
+                if token in found or count < len(grams) * 0.3:
+                    continue
+                # Erro de digitação no token inteiro ou (no último termo) no começo dele
+                distance = edit_distance(term, token, limit)
+                if allow_prefix and len(token) > len(term):
+                    distance = min(distance, edit_distance(term, token[:len(term)], limit))
+                if distance <= limit:
+                    found[token] = 0.4 * (1 - distance / (len(term) + 1))
+        return found
+
+    def search(self, query: str, limit: int = MAX_RESULTS) -> List[Tuple[int, float]]:
+        """Retorna [(id, nota)] do mais para o menos relevante. Todos os termos precisam casar."""
+        return self._search(query)[0][:limit]
+
+    def _search(self, query: str):
+        """Todos os resultados ranqueados e, para cada termo, os tokens do vocabulário que casaram com ele"""
+        terms = tokenize(query)
+        if not terms:
+            return [], []
+
+        matched_tokens = []
+        with self._lock:
+            scores = None
+            for position, term in enumerate(terms):
+                term_scores = {}
+                candidates = self._candidates(term, allow_prefix=position == len(terms) - 1)
+                matched_tokens.append({token: self._spellings.get(token, {token}) for token in candidates})
+                for token, quality in candidates.items():
+                    for scanner_id, weight in self._postings[token].items():
+                        score = quality * weight
+                        if score > term_scores.get(scanner_id, 0):
+                            term_scores[scanner_id] = score
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {i: s + term_scores[i] for i, s in scores.items() if i in term_scores}
+                if not scores:
+                    return [], matched_tokens
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked, matched_tokens
+
+    async def match(self, db, term: str) -> SearchMatch:
+        if not self.ready:
+            # Só espera a montagem quando ainda não há índice nenhum
+            async with self._warm_lock:
+                if not self.ready:
+                    await self.warm(db)
+        elif not self.built:
+            self._schedule_rebuild(db.bind)
+
+        Scanner = scanner_model.Scanner
+        # Pontuar um termo comum num catálogo grande é CPU pura: roda fora do event loop
+        ranked, matched_tokens = await asyncio.to_thread(self._search, term)
+        if not ranked:
+            return SearchMatch(false(), None)
+
+        approximate = len(ranked) > MAX_RESULTS
+        ranked = ranked[:MAX_RESULTS]
+
+        # Agrupa os ids por nota: o CASE fica com poucas faixas em vez de uma por produto
+        by_score = defaultdict(list)
+        for scanner_id, score in ranked:
+            by_score[round(score, 4)].append(scanner_id)
+        relevance = case(
+            *((Scanner.id.in_(ids), score) for score, ids in sorted(by_score.items(), reverse=True)),
+            else_=0,
+        )
+
+        if not approximate:
+            ids = [scanner_id for scanner_id, _ in ranked]
+            return SearchMatch(Scanner.id.in_(ids), relevance)
+
+        # Resultados demais para um IN: cada termo vira um ILIKE pelas grafias dos tokens que
+        # casaram com ele, para que os demais filtros (marca, preço, estoque) e a contagem
+        # rodem sobre todos os resultados, e não só sobre os MAX_RESULTS mais relevantes
+        clause = and_(*(
+            or_(*(
+                column.ilike(f"%{word}%")
+                for spellings in tokens.values() for word in spellings
+                for column in (Scanner.model, Scanner.brand)
+            ))
+            for tokens in matched_tokens
+        ))
+        return SearchMatch(clause, relevance, approximate=True)
+
+
+BACKENDS = {
+    "memory": InMemorySearchIndex,
+    "fulltext": FulltextSearchBackend,
+    "like": LikeSearchBackend,
+}
+
+
+def create_backend(name: Optional[str] = None) -> SearchBackend:
+    return BACKENDS[name or SEARCH_BACKEND]()
+
+
+backend = create_backend()
@@ -0,0 +1,87 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Callable, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+import models.scanner as scanner_model
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele, usa o json da biblioteca padrão
+    orjson = None
+
+# Colunas que um card da vitrine usa (padrão da listagem)
+CARD_FIELDS = (
+    "id", "model", "brand", "item_condition", "original_price",
+    "sale_price", "image_url", "purchase_link", "in_stock",
+)
+# Tudo o que pode ser pedido com fields= (e o que o detalhe retorna)
+PUBLIC_FIELDS = CARD_FIELDS + ("created_date",)
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse com orjson quando instalado; aceita também bytes já codificados (ex: vindos do cache)"""
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def parse_fields(value: Optional[str], default: Tuple[str, ...] = CARD_FIELDS) -> Tuple[str, ...]:
+    """Converte fields=model,sale_price na tupla de colunas; o id sempre vem. ValueError se houver campo desconhecido."""
+    if not value:
+        return default
+    requested = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in PUBLIC_FIELDS]
+    if unknown:
+        raise ValueError(f"Campos desconhecidos: {', '.join(unknown)}. Use: {', '.join(PUBLIC_FIELDS)}")
+    # Mantém a ordem canônica (e a chave de cache estável) independente da ordem pedida
+    return tuple(name for name in PUBLIC_FIELDS if name == "id" or name in requested)
+
+
+def columns(fields: Sequence[str]):
+    Scanner = scanner_model.Scanner
+    return [getattr(Scanner, name) for name in fields]
+
+
+@lru_cache(maxsize=64)
+def row_encoder(fields: Tuple[str, ...]) -> Callable[[Sequence], dict]:
+    """
+    Conversor de linha (tupla vinda do banco) para dict, montado uma vez por conjunto de campos.
+    Só as colunas DECIMAL passam por conversão; as demais vão direto para o JSON.
+    """
+    Scanner = scanner_model.Scanner
+    decimal_positions = [
+        index for index, name in enumerate(fields)
+        if getattr(Scanner, name).type.python_type is Decimal
+    ]
+
+    if not decimal_positions:
+        return lambda row: dict(zip(fields, row))
+
+    def encode(row) -> dict:
+        values = list(row)
+        for index in decimal_positions:
+            if values[index] is not None:
+                values[index] = float(values[index])
+        return dict(zip(fields, values))
+
+    return encode
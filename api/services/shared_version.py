@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy import insert, update
+
+import database
+from models.cache_version import CacheVersion
+
+# De quanto em quanto tempo (segundos) cada instância confere a versão no banco.
+# Entre uma conferência e outra, usa-se a última versão conhecida.
+VERSION_CHECK_INTERVAL = float(os.getenv("VERSION_CHECK_INTERVAL", "1.0"))
+
+
+class SharedVersion:
+    """
+    Contador guardado numa linha da tabela cache_versions e compartilhado entre as instâncias.
+    Quem escreve incrementa a versão na mesma transação da escrita; quem lê confere a versão
+    com uma leitura por chave primária e descarta o que tem em memória quando ela muda.
+    """
+
+    def __init__(self, name: str, check_interval: float = VERSION_CHECK_INTERVAL):
+        self.name = name
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._known_version: Optional[int] = None
+        self._checked_at = 0.0
+        self._listeners: List[Callable[[], None]] = []
+
+    def subscribe(self, callback: Callable[[], None]):
+        """Registra uma função chamada quando outra instância altera a versão"""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Erro ao invalidar cache ({self.name}): {str(e)}")
+
+    async def _read(self, db) -> int:
+        row = await db.get(CacheVersion, self.name, populate_existing=True)
+        return row.version if row else 0
+
+    def observe(self, version: int):
+        """Atualiza a versão conhecida. Se pulou alguma versão, outra instância escreveu no meio."""
+        with self._lock:
+            changed_elsewhere = self._known_version is not None and version - 1 > self._known_version
+            if self._known_version is None or version > self._known_version:
+                self._known_version = version
+            self._checked_at = time.monotonic()
+        if changed_elsewhere:
+            self._notify()
+
+    def known(self) -> str:
+        """Última versão conhecida, sem ir ao banco"""
+        return str(self._known_version or 0)
+
+    async def current(self) -> str:
+        """Versão atual, conferida no banco (leitura por chave primária) no máximo a cada check_interval"""
+        now = time.monotonic()
+        with self._lock:
+            if self._known_version is not None and now - self._checked_at < self.check_interval:
+                return str(self._known_version)
+            # Marca como conferida antes de ir ao banco: as outras requisições seguem com a versão atual
+            self._checked_at = now
+
+        try:
+            async with database.AsyncSessionLocal() as db:
+                version = await self._read(db)
+        except Exception as e:
+            print(f"Erro ao ler versão ({self.name}): {str(e)}")
+            return self.known()
+
+        with self._lock:
+            previous = self._known_version
+            self._known_version = version
+        if previous is not None and version != previous:
+            self._notify()
+        return str(version)
+
+    def _bump_statement(self):
+        return (
+            update(CacheVersion)
+            .where(CacheVersion.name == self.name)
+            .values(version=CacheVersion.version + 1)
+        )
+
+    async def bump(self, db) -> int:
+        """
+        Incrementa a versão dentro da transação de escrita (antes do commit), para que
+        a escrita e a nova versão fiquem visíveis juntas. Retorna a nova versão;
+        depois do commit, passe-a para observe().
+        """
+        result = await db.execute(self._bump_statement())
+        if result.rowcount == 0:
+            db.add(CacheVersion(name=self.name, version=1))
+            await db.flush()
+        return await self._read(db)
+
+    def bump_sync(self, db) -> int:
+        """Mesmo que bump(), para sessões síncronas (scripts de linha de comando)"""
+        result = db.execute(self._bump_statement())
+        if result.rowcount == 0:
+            db.add(CacheVersion(name=self.name, version=1))
+            db.flush()
+        return db.get(CacheVersion, self.name, populate_existing=True).version
+
+    def bump_connection(self, connection):
+        """Incrementa usando a conexão de um evento do ORM (ex: after_delete), na mesma transação"""
+        result = connection.execute(self._bump_statement())
+        if result.rowcount == 0:
+            connection.execute(insert(CacheVersion).values(name=self.name, version=1))
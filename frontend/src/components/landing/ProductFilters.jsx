@@ -2,13 +2,20 @@ import React, { useState, useEffect } from 'react';
 import { motion } from 'framer-motion';
 import { Search, Filter, X, SlidersHorizontal } from 'lucide-react';
 
-const PRICE_RANGES = [
+const formatPrice = (value) => `R$ ${value.toLocaleString('pt-BR')}`;
+
+// Monta as opções de preço a partir do histograma de /scanners/facets
+const buildPriceOptions = (buckets) => [
   { label: "Todos os preços", value: "all" },
-  { label: "Até R$ 500", value: "0-500" },
-  { label: "R$ 500 - R$ 1.000", value: "500-1000" },
-  { label: "R$ 1.000 - R$ 2.000", value: "1000-2000" },
-  { label: "R$ 2.000 - R$ 5.000", value: "2000-5000" },
-  { label: "Acima de R$ 5.000", value: "5000+" },
+  ...buckets.map(bucket => {
+    if (bucket.max == null) {
+      return { label: `Acima de ${formatPrice(bucket.min)} (${bucket.count})`, value: `${bucket.min}+` };
+    }
+    const label = bucket.min === 0
+      ? `Até ${formatPrice(bucket.max)}`
+      : `${formatPrice(bucket.min)} - ${formatPrice(bucket.max)}`;
+    return { label: `${label} (${bucket.count})`, value: `${bucket.min}-${bucket.max}` };
+  })
 ];
 
 // Componente de input
@@ -121,7 +128,8 @@ export default function ProductFilters({
   priceRange,
   setPriceRange,
   totalResults,
-  brands = []
+  brands = [],
+  priceBuckets = []
 }) {
   const hasActiveFilters = searchTerm || selectedBrand !== "all" || priceRange !== "all";
 
@@ -142,7 +150,7 @@ export default function ProductFilters({
     ...allBrands.map(brand => ({ label: brand, value: brand }))
   ];
 
-  const priceOptions = PRICE_RANGES;
+  const priceOptions = buildPriceOptions(priceBuckets);
 
   return (
     <motion.div
@@ -178,6 +186,19 @@ export default function ProductFilters({
             />
           </div>
 
+          {/* Price Filter */}
+          {priceBuckets.length > 0 && (
+            <div className="w-full sm:w-[220px]">
+              <CustomSelect
+                value={priceRange}
+                onValueChange={setPriceRange}
+                icon={SlidersHorizontal}
+                placeholder="Preço"
+                options={priceOptions}
+              />
+            </div>
+          )}
+
           {/* Clear Filters */}
           {hasActiveFilters && (
             <motion.div
@@ -227,7 +248,7 @@ export default function ProductFilters({
 
             {priceRange !== "all" && (
               <span className="inline-flex items-center px-3 py-1 rounded-full text-xs font-medium bg-green-500/10 text-green-400 border border-green-500/30">
-                Preço: {PRICE_RANGES.find(r => r.value === priceRange)?.label}
+                Preço: {priceOptions.find(r => r.value === priceRange)?.label ?? priceRange}
                 <button 
                   onClick={() => setPriceRange("all")} 
                   className="ml-2 hover:text-white transition-colors"
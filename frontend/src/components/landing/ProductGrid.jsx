@@ -49,6 +49,17 @@ const AlertDescription = ({ children, className = '' }) => (
   <div className={`text-sm ${className}`}>{children}</div>
 );
 
+// Converte o valor da faixa de preço ("500-1000" ou "5000+") em min_price/price_below.
+// As faixas do histograma são [min, max): o limite de cima é exclusivo, como no servidor.
+const parsePriceRange = (priceRange) => {
+  if (priceRange === "all") return {};
+  if (priceRange.endsWith('+')) {
+    return { min_price: parseFloat(priceRange.slice(0, -1)) };
+  }
+  const [min, max] = priceRange.split("-").map(parseFloat);
+  return { min_price: min, price_below: max };
+};
+
 export default function ProductGrid() {
   const [scanners, setScanners] = useState([]);
   const [isLoading, setIsLoading] = useState(true);
@@ -65,6 +76,7 @@ export default function ProductGrid() {
   const [totalItems, setTotalItems] = useState(0);
   const [totalPages, setTotalPages] = useState(0);
   const [availableBrands, setAvailableBrands] = useState([]);
+  const [priceBuckets, setPriceBuckets] = useState([]);
 
   const itemsPerPage = 12;
 
@@ -84,34 +96,23 @@ export default function ProductGrid() {
     setError(null);
 
     try {
-      // Converter priceRange para min/max
-      let minPrice, maxPrice;
-      if (priceRange !== "all") {
-        const [min, max] = priceRange.split("-").map(str => {
-          if (str.includes('+')) {
-            return parseFloat(str.replace('+', ''));
-          }
-          return parseFloat(str);
-        });
-
-        if (priceRange === "5000+") {
-          minPrice = 5000;
-          maxPrice = undefined;
-        } else {
-          minPrice = min;
-          maxPrice = max;
-        }
-      }
-
-      const response = await api.getScanners({
+      const filters = {
         brand: selectedBrand !== "all" ? selectedBrand : undefined,
-        min_price: minPrice,
-        max_price: maxPrice,
+        ...parsePriceRange(priceRange),
         search: searchTerm,
-        page: pageToFetch,
-        limit: itemsPerPage,
         in_stock: true
-      });
+      };
+
+      // Listagem e contagens do painel de filtros em paralelo (as facetas são só um agregado)
+      const [response, facets] = await Promise.all([
+        api.getScanners({ ...filters, page: pageToFetch, limit: itemsPerPage }),
+        api.getFacets(filters).catch(() => null)
+      ]);
+
+      if (facets) {
+        setAvailableBrands(facets.brands.map(b => b.value));
+        setPriceBuckets(facets.price_histogram);
+      }
 
       setScanners(response.scanners || []);
       setTotalItems(response.total || 0);
@@ -339,6 +340,7 @@ export default function ProductGrid() {
           setPriceRange={setPriceRange}
           totalResults={totalItems}
           brands={availableBrands}
+          priceBuckets={priceBuckets}
         />
 
         {/* Loading durante filtragem */}
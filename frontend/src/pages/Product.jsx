@@ -36,24 +36,16 @@ export default function Product() {
     queryKey: ['scanner', productId],
     queryFn: async () => {
       if (!productId) return null;
-      // Como sua API atual busca por lista, vamos buscar e filtrar (ou crie um endpoint getById)
-      // Se você tiver getScannerById na api.js, use-o. 
-      // Abaixo, simulando busca na lista para encontrar o ID específico:
-      const res = await api.getScanners({ limit: 100 }); 
-      return res.scanners.find(s => s.id.toString() === productId);
+      return api.getScannerById(productId);
     },
     enabled: !!productId,
   });
 
-  // 2. Busca Produtos Relacionados (Só roda quando temos a marca do produto principal)
+  // 2. Busca Produtos Relacionados (em paralelo com o principal: o servidor já sabe quais são)
   const { data: relatedData } = useQuery({
-    queryKey: ['related-scanners', scanner?.brand, productId],
-    queryFn: () => api.getScanners({
-      brand: scanner.brand,
-      limit: 4,
-      exclude_id: productId // Exclui o produto atual da lista
-    }),
-    enabled: !!scanner?.brand, // Só busca se o scanner principal já carregou
+    queryKey: ['related-scanners', productId],
+    queryFn: () => api.getRelatedScanners(productId, 4),
+    enabled: !!productId,
   });
 
   const relatedScanners = relatedData?.scanners || [];
@@ -266,7 +258,7 @@ export default function Product() {
         </div>
 
         {/* Seção de Relacionados */}
-        {relatedScanners.length > 0 && (
+        {scanner && relatedScanners.length > 0 && (
           <motion.div 
             initial={{ opacity: 0, y: 40 }}
             whileInView={{ opacity: 1, y: 0 }}
@@ -276,9 +268,9 @@ export default function Product() {
             <div className="flex items-center justify-between mb-12">
               <div>
                 <h2 className="text-3xl font-bold text-white mb-2">
-                  Outros scanners <span className="text-[#F2C335]">{scanner.brand}</span>
+                  Scanners <span className="text-[#F2C335]">similares</span>
                 </h2>
-                <p className="text-slate-400">Produtos similares que podem te interessar</p>
+                <p className="text-slate-400">Mesma marca, condição ou faixa de preço deste {scanner.brand}</p>
               </div>
               <Link 
                 to="/" 
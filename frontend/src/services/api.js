@@ -56,9 +56,16 @@ export const api = {
     const queryParams = new URLSearchParams();
 
     if (params.skip) queryParams.append('skip', params.skip);
+    if (params.page) queryParams.append('page', params.page);
+    if (params.cursor) queryParams.append('cursor', params.cursor);
     if (params.limit) queryParams.append('limit', params.limit);
     if (params.search) queryParams.append('search', params.search);
     if (params.brand) queryParams.append('brand', params.brand);
+    if (params.min_price != null) queryParams.append('min_price', params.min_price);
+    if (params.max_price != null) queryParams.append('max_price', params.max_price);
+    if (params.price_below != null) queryParams.append('price_below', params.price_below);
+    if (params.in_stock != null) queryParams.append('in_stock', params.in_stock);
+    if (params.sort) queryParams.append('sort', params.sort);
 
     // Novo parâmetro para excluir um ID específico (usado nos "Relacionados")
     if (params.exclude_id) queryParams.append('exclude_id', params.exclude_id);
@@ -70,6 +77,34 @@ export const api = {
     return response.json();
   },
 
+  // Contagens do painel de filtros (marcas, condições e faixas de preço) numa única chamada
+  getFacets: async (params = {}) => {
+    const queryParams = new URLSearchParams();
+
+    if (params.search) queryParams.append('search', params.search);
+    if (params.brand) queryParams.append('brand', params.brand);
+    if (params.min_price != null) queryParams.append('min_price', params.min_price);
+    if (params.max_price != null) queryParams.append('max_price', params.max_price);
+    if (params.price_below != null) queryParams.append('price_below', params.price_below);
+    if (params.in_stock != null) queryParams.append('in_stock', params.in_stock);
+    if (params.price_buckets) queryParams.append('price_buckets', params.price_buckets);
+
+    const response = await fetch(`${API_URL}/scanners/facets?${queryParams.toString()}`);
+    if (!response.ok) {
+      throw new Error('Erro ao buscar filtros');
+    }
+    return response.json();
+  },
+
+  // Produtos parecidos (marca, condição e preço próximo), já calculados no servidor
+  getRelatedScanners: async (id, limit = 4) => {
+    const response = await fetch(`${API_URL}/scanners/${id}/related?limit=${limit}`);
+    if (!response.ok) {
+      throw new Error('Erro ao buscar produtos relacionados');
+    }
+    return response.json();
+  },
+
   getScannerById: async (id) => {
     const response = await fetch(`${API_URL}/scanners/${id}`);
     if (!response.ok) {
@@ -129,6 +164,58 @@ export const api = {
     return response.json();
   },
 
+  // --- OPERAÇÕES EM LOTE (PROTEGIDAS) ---
+
+  // Aplica as mesmas alterações (ex: { in_stock: false }) a vários scanners de uma vez
+  batchUpdateScanners: async (ids, changes) => {
+    const response = await fetch(`${API_URL}/scanners/batch`, {
+      method: 'PATCH',
+      headers: {
+        'Content-Type': 'application/json',
+        ...getAuthHeaders(),
+      },
+      body: JSON.stringify({ ids, changes }),
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || 'Erro ao atualizar scanners');
+    }
+    return response.json();
+  },
+
+  // Envia um arquivo .csv ou .ndjson; retorna { inserted, updated, failed, errors }
+  importScanners: async (file) => {
+    const isCsv = file.name.toLowerCase().endsWith('.csv');
+    const response = await fetch(`${API_URL}/scanners/import?format=${isCsv ? 'csv' : 'ndjson'}`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': isCsv ? 'text/csv' : 'application/x-ndjson',
+        ...getAuthHeaders(),
+      },
+      body: file,
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.detail || 'Erro ao importar scanners');
+    }
+    return response.json();
+  },
+
+  exportScanners: async (format = 'csv') => {
+    const response = await fetch(`${API_URL}/scanners/export?format=${format}`, {
+      headers: {
+        ...getAuthHeaders(),
+      },
+    });
+
+    if (!response.ok) {
+      throw new Error('Erro ao exportar scanners');
+    }
+    return response.blob();
+  },
+
   // --- UPLOAD DE IMAGEM ---
 
   uploadImage: async (formData) => {